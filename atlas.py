@@ -0,0 +1,91 @@
+"""Texture atlas of all block textures
+
+One image with a 16x16 tile per biome texture plus planks, side by side in the order of the
+biome codes, and the UV rect of every tile. It is built once with `python atlas.py` into
+`assets/atlas.png` and `assets/atlas.json`. Blocks and chunk meshes all draw with this one
+texture, a block gets the UV rect of its tile in its vertex data.
+"""
+
+import json
+import logging
+from os import path
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+from PIL import Image
+
+import conf
+from block import BIOME_TEXTURES, BIOMES_BY_CODE
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+ATLAS_TILES: Tuple[str, ...] = tuple(BIOME_TEXTURES[biome] for biome in BIOMES_BY_CODE) + (
+    "plank.png",
+)
+ATLAS_TILE_PIXELS = 16
+ATLAS_INSET = 0.5 / ATLAS_TILE_PIXELS  # Keep UVs off the tile border to avoid bleeding
+PLANK_TILE = len(BIOMES_BY_CODE)
+
+ASSETS_FOLDER = "assets"
+ATLAS_IMAGE = "atlas.png"
+ATLAS_RECTS = "atlas.json"
+
+
+class UVRect(NamedTuple):
+    u0: float
+    v0: float
+    u1: float
+    v1: float
+
+
+def uv_rects(tiles: Sequence[str] = ATLAS_TILES) -> Dict[str, UVRect]:
+    """UV rect per tile file name, inset by half a pixel"""
+    inset = ATLAS_INSET / len(tiles)
+    return {
+        name: UVRect(
+            index / len(tiles) + inset,
+            ATLAS_INSET,
+            (index + 1) / len(tiles) - inset,
+            1 - ATLAS_INSET,
+        )
+        for index, name in enumerate(tiles)
+    }
+
+
+def build_atlas(folder: str = ASSETS_FOLDER, tiles: Sequence[str] = ATLAS_TILES) -> Image.Image:
+    """Texture atlas with the tiles side by side, in the order of the tile indexes"""
+    atlas = Image.new("RGBA", (ATLAS_TILE_PIXELS * len(tiles), ATLAS_TILE_PIXELS))
+    for index, name in enumerate(tiles):
+        with Image.open(path.join(folder, name)) as image:
+            tile = image.convert("RGBA").resize((ATLAS_TILE_PIXELS, ATLAS_TILE_PIXELS))
+        atlas.paste(tile, (index * ATLAS_TILE_PIXELS, 0))
+    return atlas
+
+
+def save_atlas(folder: str = ASSETS_FOLDER, tiles: Sequence[str] = ATLAS_TILES) -> None:
+    build_atlas(folder, tiles).save(path.join(folder, ATLAS_IMAGE))
+    rects = {name: rect._asdict() for name, rect in uv_rects(tiles).items()}
+    with open(path.join(folder, ATLAS_RECTS), "w") as file:
+        json.dump({"tile_pixels": ATLAS_TILE_PIXELS, "tiles": rects}, file, indent=2)
+        file.write("\n")
+
+
+def load_atlas(
+    folder: str = ASSETS_FOLDER, tiles: Sequence[str] = ATLAS_TILES
+) -> Tuple[Image.Image, Dict[str, UVRect]]:
+    """The built atlas and its UV rects, built now if the files miss or have other tiles"""
+    try:
+        with open(path.join(folder, ATLAS_RECTS)) as file:
+            header = json.load(file)
+        rects = {name: UVRect(**rect) for name, rect in header["tiles"].items()}
+        if list(rects) == list(tiles) and header["tile_pixels"] == ATLAS_TILE_PIXELS:
+            with Image.open(path.join(folder, ATLAS_IMAGE)) as image:
+                return image.convert("RGBA"), rects
+    except (OSError, KeyError, TypeError, ValueError) as error:
+        logger.warning(f"Atlas not loaded: {error}")
+    logger.warning("Building the texture atlas, run `python atlas.py` to save it")
+    return build_atlas(folder, tiles), uv_rects(tiles)
+
+
+if __name__ == "__main__":
+    save_atlas()
+    print(f"Saved {path.join(ASSETS_FOLDER, ATLAS_IMAGE)} with {len(ATLAS_TILES)} tiles")
@@ -0,0 +1,216 @@
+"""Headless benchmarks of world generation and streaming
+
+Runs without a window or GPU. Every benchmark is timed `repeat` times and the fastest run is
+kept. Results are written as JSON and compared against a stored baseline, a benchmark that is
+more than `tolerance` slower than its baseline is a regression and gives exit code 1.
+
+    python benchmark.py --save-baseline
+    python benchmark.py --sizes 50 200 --render-sizes 4 8
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from os import makedirs, path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import conf
+from chunk_mesh import build_chunk_meshes
+from generate_world import (
+    NOISE_HEAT,
+    NOISE_HEIGHT_ISLAND,
+    combine_maps,
+    convert_to_blocks_map,
+    create_circular_map_mask,
+    generate_noise_map,
+    world_map_colors,
+    world_map_image,
+)
+from utils import chunks_in_2dcircle, points_changed_2dcircle, points_in_2dcircle
+
+WORLD_SIZES = [50, 200, 500, 1000, 2000]
+RENDER_SIZES = [4, 8, 20, 30]
+SEED = conf.ISLAND_SEED_CLASSIC
+RESULTS_PATH = path.join("benchmarks", "results.json")
+BASELINE_PATH = path.join("benchmarks", "baseline.json")
+TOLERANCE = 0.25  # Allowed slowdown against the baseline
+NOISE_FLOOR = 0.001  # Seconds, smaller differences are never a regression
+
+Results = Dict[str, float]
+
+
+class Regression(NamedTuple):
+    name: str
+    seconds: float
+    baseline: float
+
+
+def best_time(function: Callable, repeat: int, setup: Optional[Callable] = None) -> float:
+    """Fastest of `repeat` runs in seconds. With `setup` every run gets a fresh `setup()` as
+    argument, the setup is not timed."""
+    times = list()
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        time_start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - time_start)
+    return min(times)
+
+
+def world_generation(size: int, repeat: int, workers: int) -> Results:
+    """Steps of `UrsinaMC` world generation for a world of `size` x `size`"""
+    shape = (size, size)
+    height_map = generate_noise_map(shape, SEED, workers=workers, **NOISE_HEIGHT_ISLAND)
+    heat_map = generate_noise_map(shape, SEED, workers=workers, **NOISE_HEAT)
+    mask = create_circular_map_mask(size)
+    height_island = combine_maps(height_map.copy(), mask)
+    world_map = convert_to_blocks_map(height_island, heat_map, workers=workers)
+    benchmarks: Dict[str, Callable] = {
+        "generate_noise_map": lambda: generate_noise_map(
+            shape, SEED, workers=workers, **NOISE_HEIGHT_ISLAND
+        ),
+        "create_circular_map_mask": lambda: create_circular_map_mask(size),
+        # Changes the height map in place, every run gets a copy
+        "combine_maps": lambda heights: combine_maps(heights, mask),
+        "convert_to_blocks_map": lambda: convert_to_blocks_map(
+            height_island, heat_map, workers=workers
+        ),
+        "world_map_colors": lambda: world_map_colors(world_map),
+        "world_map_image": lambda: world_map_image(world_map),
+    }
+    setups = {"combine_maps": height_map.copy}
+    return {
+        f"{name}[world_size={size}]": best_time(function, repeat, setups.get(name))
+        for name, function in benchmarks.items()
+    }
+
+
+def streaming(render_size: int, repeat: int, world_map) -> Results:
+    """Work of `World.update_positions` without entities, for a walk of one cell and a
+    diagonal step"""
+    world_size = world_map.shape[0]
+    center = (world_size // 2, world_size // 2)
+    chunk_size = conf.MESH_CHUNK_SIZE
+    keys = chunks_in_2dcircle(render_size, center, chunk_size, world_size)
+
+    def walk():
+        for step in range(render_size):
+            old, new = (center[0] + step, center[1]), (center[0] + step + 1, center[1])
+            points_changed_2dcircle(render_size, old, new)
+
+    def chunk_meshes():
+        for key in keys:
+            build_chunk_meshes(world_map, key[0] * chunk_size, key[1] * chunk_size, chunk_size)
+
+    benchmarks = {
+        "points_in_2dcircle": lambda: points_in_2dcircle(render_size, *center),
+        "points_changed_2dcircle": walk,
+        "points_changed_2dcircle_diagonal": lambda: points_changed_2dcircle(
+            render_size, center, (center[0] + 1, center[1] + 1)
+        ),
+        "set_difference_2dcircle": lambda: points_in_2dcircle(render_size, *center)
+        - points_in_2dcircle(render_size, center[0] + 1, center[1]),
+        "chunks_in_2dcircle": lambda: chunks_in_2dcircle(
+            render_size, center, chunk_size, world_size
+        ),
+        "build_chunk_meshes": chunk_meshes,
+    }
+    return {
+        f"{name}[render_size={render_size}]": best_time(function, repeat)
+        for name, function in benchmarks.items()
+    }
+
+
+def run(
+    world_sizes: Sequence[int], render_sizes: Sequence[int], repeat: int, workers: int
+) -> Results:
+    results: Results = dict()
+    for size in world_sizes:
+        print(f"World size {size}", file=sys.stderr)
+        results.update(world_generation(size, repeat, workers))
+    size = max(2 * max(render_sizes) + 2, 100)
+    height_map = generate_noise_map((size, size), SEED, workers=workers, **NOISE_HEIGHT_ISLAND)
+    heat_map = generate_noise_map((size, size), SEED, workers=workers, **NOISE_HEAT)
+    world_map = convert_to_blocks_map(height_map, heat_map, workers=workers)
+    for render_size in render_sizes:
+        print(f"Render size {render_size}", file=sys.stderr)
+        results.update(streaming(render_size, repeat, world_map))
+    return results
+
+
+def compare(results: Results, baseline: Results, tolerance: float = TOLERANCE) -> List[Regression]:
+    """Benchmarks more than `tolerance` slower than the baseline"""
+    regressions = list()
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None or seconds - base <= NOISE_FLOOR:
+            continue
+        if seconds > base * (1 + tolerance):
+            regressions.append(Regression(name, seconds, base))
+    return regressions
+
+
+def report(data: dict) -> dict:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        **data,
+    }
+
+
+def load(file_path: str) -> Optional[Results]:
+    if not path.exists(file_path):
+        return None
+    with open(file_path) as file:
+        return json.load(file)["results"]
+
+
+def save(file_path: str, data: dict) -> None:
+    makedirs(path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w") as file:
+        json.dump(data, file, indent=2)
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=WORLD_SIZES)
+    parser.add_argument("--render-sizes", type=int, nargs="+", default=RENDER_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="0 uses all CPU cores")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as baseline")
+    options = parser.parse_args(args)
+
+    results = run(options.sizes, options.render_sizes, options.repeat, options.workers)
+    data = report({"repeat": options.repeat, "workers": options.workers, "results": results})
+    save(options.baseline if options.save_baseline else options.output, data)
+    if options.save_baseline:
+        print(f"Saved baseline {options.baseline}")
+        return 0
+
+    baseline = load(options.baseline)
+    if baseline is None:
+        print(f"No baseline {options.baseline}, run with --save-baseline first")
+        return 0
+    regressions = compare(results, baseline, options.tolerance)
+    for regression in regressions:
+        print(
+            f"Regression {regression.name}: {regression.seconds:.4f}s, "
+            f"baseline {regression.baseline:.4f}s"
+        )
+    print(f"{len(results)} benchmarks, {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import math
+import operator
 from enum import Enum
+from typing import Any, Callable, NamedTuple, Optional, Tuple
 
-from matplotlib import colors
+import numpy as np
 
 
 class Biomes(str, Enum):
@@ -15,8 +17,63 @@ class Biomes(str, Enum):
     MOUNTAIN_SNOW = "white"
 
 
+# Compact biome codes as stored in the world map arrays
+BIOMES_BY_CODE = tuple(Biomes)
+BIOME_CODES = {biome: code for code, biome in enumerate(BIOMES_BY_CODE)}
+WATER_BIOMES = (Biomes.LAKE, Biomes.SEA)
+
+# Texture file in the assets folder per biome
+BIOME_TEXTURES = {
+    Biomes.SEA: "sea.png",
+    Biomes.LAKE: "water.png",
+    Biomes.DESERT: "sand.png",
+    Biomes.SAVANNA: "savanna.png",
+    Biomes.PLANE: "grass.png",
+    Biomes.HILL: "grass_stone.png",
+    Biomes.MOUNTAIN: "stone.png",
+    Biomes.MOUNTAIN_SNOW: "snow.png",
+}
+
+Condition = Tuple[Callable[[Any, float], Any], float]
+
+
+class BiomeRule(NamedTuple):
+    """Biome for cells matching the height and heat condition, e.g. `(operator.lt, 0.5)`"""
+
+    biome: Biomes
+    height: Optional[Condition] = None
+    heat: Optional[Condition] = None
+
+    def matches(self, height, heat):
+        """Works for scalars and numpy arrays alike"""
+        match = True
+        if self.height:
+            compare, value = self.height
+            match = match & compare(height, value)
+        if self.heat:
+            compare, value = self.heat
+            match = match & compare(heat, value)
+        return match
+
+
+# First matching rule wins, the last rule is the fallback
+BIOME_RULES: Tuple[BiomeRule, ...] = (
+    BiomeRule(Biomes.SEA, height=(operator.eq, 0)),
+    BiomeRule(Biomes.LAKE, height=(operator.lt, 0.1)),
+    BiomeRule(Biomes.DESERT, height=(operator.lt, 0.5), heat=(operator.gt, 0.6)),
+    BiomeRule(Biomes.SAVANNA, height=(operator.lt, 0.5), heat=(operator.gt, 0.4)),
+    BiomeRule(Biomes.PLANE, height=(operator.lt, 0.65)),
+    BiomeRule(Biomes.HILL, height=(operator.lt, 0.8)),
+    BiomeRule(Biomes.MOUNTAIN_SNOW, height=(operator.gt, 0.95), heat=(operator.gt, 0.6)),
+    BiomeRule(Biomes.MOUNTAIN),
+)
+
+WORLD_HEIGHT_STEEPNESS = 4  # mountain steepness
+WORLD_HEIGHT_SCALE = 40  # general hight curve
+
+
 class BiomeBlock:
-    biome: str
+    biome: Biomes
     world_height: int
 
     def __init__(self, height, heat):
@@ -24,33 +81,29 @@ class BiomeBlock:
         self.set_world_height(height)
 
     def set_world_height(self, height):
-        height = math.pow(height, 4)  # mountain steepness
-        height = int(height * 40)  # general hight curve
+        height = math.pow(height, WORLD_HEIGHT_STEEPNESS)
+        height = int(height * WORLD_HEIGHT_SCALE)
         self.world_height = height
 
     def set_biome(self, height, heat):
-        if height == 0:
-            self.biome = Biomes.SEA
-        elif height < 0.1:
-            self.biome = Biomes.LAKE
-        elif height < 0.5:
-            if heat > 0.6:
-                self.biome = Biomes.DESERT
-            elif heat > 0.4:
-                self.biome = Biomes.SAVANNA
-            else:
-                self.biome = Biomes.PLANE
-        elif height < 0.65:
-            self.biome = Biomes.PLANE
-        elif height < 0.8:
-            self.biome = Biomes.HILL
-        elif height > 0.95 and heat > 0.6:
-            self.biome = Biomes.MOUNTAIN_SNOW
-        else:
-            self.biome = Biomes.MOUNTAIN
+        self.biome = next(rule.biome for rule in BIOME_RULES if rule.matches(height, heat))
 
     def color(self, multiply=None):
+        from matplotlib import colors  # Slow import, not needed for the main menu
+
         colour = colors.to_rgb(self.biome.value)
         if multiply:
             colour = [c * multiply for c in colour]
         return colour
+
+
+def classify_blocks(height_map: np.ndarray, heat_map: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized BiomeBlock for whole maps, returns biome codes and world heights"""
+    conditions = [
+        np.broadcast_to(rule.matches(height_map, heat_map), height_map.shape)
+        for rule in BIOME_RULES
+    ]
+    codes = [BIOME_CODES[rule.biome] for rule in BIOME_RULES]
+    biome = np.select(conditions, codes).astype(np.uint8)
+    world_height = np.power(height_map, WORLD_HEIGHT_STEEPNESS) * WORLD_HEIGHT_SCALE
+    return biome, world_height.astype(np.int16)
@@ -0,0 +1,228 @@
+"""Terrain meshes for square chunks of the world map
+
+All visible block faces of a chunk are merged into one mesh, faces between neighbouring solid
+blocks are left out. Every face gets the UV rect of its biome in a texture atlas with one
+16x16 tile per biome, so a chunk is drawn with a single texture.
+
+Block (x, y, z) is the unit cube centered on (x + 0.5, y, z + 0.5), like `play.Block`. A land
+column is filled from its height down to one block below the lowest neighbour, water is a
+single cube lowered by `WATER_OFFSET`.
+"""
+
+from typing import NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from atlas import uv_rects
+from block import BIOME_CODES, WATER_BIOMES
+from utils import timeit
+from world_map import WorldMap
+
+TILE_RECTS = np.array(list(uv_rects().values()), dtype=np.float32)  # (tiles, 4) per tile index
+
+WATER_OFFSET = -0.3
+WATER_CODES = [BIOME_CODES[biome] for biome in WATER_BIOMES]
+OUTSIDE = 255  # Biome code of padding cells outside the world
+
+# Face normals and corners (bottom left, bottom right, top right, top left as seen from the
+# outside) relative to (x, y, z) of the block
+TOP, EAST, WEST, NORTH, SOUTH, BOTTOM = range(6)
+FACE_NORMALS = np.array([(0, 1, 0), (1, 0, 0), (-1, 0, 0), (0, 0, 1), (0, 0, -1), (0, -1, 0)])
+FACE_CORNERS = np.array(
+    [
+        [(0, 0.5, 0), (1, 0.5, 0), (1, 0.5, 1), (0, 0.5, 1)],
+        [(1, -0.5, 0), (1, -0.5, 1), (1, 0.5, 1), (1, 0.5, 0)],
+        [(0, -0.5, 1), (0, -0.5, 0), (0, 0.5, 0), (0, 0.5, 1)],
+        [(1, -0.5, 1), (0, -0.5, 1), (0, 0.5, 1), (1, 0.5, 1)],
+        [(0, -0.5, 0), (1, -0.5, 0), (1, 0.5, 0), (0, 0.5, 0)],
+        [(0, -0.5, 1), (1, -0.5, 1), (1, -0.5, 0), (0, -0.5, 0)],
+    ],
+    dtype=np.float32,
+)
+FACE_UVS = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)
+QUAD_TRIANGLES = np.array([0, 1, 2, 2, 3, 0])
+# Slices of the padded map with the neighbour cells per side face
+NEIGHBOURS = {
+    EAST: (slice(2, None), slice(1, -1)),
+    WEST: (slice(None, -2), slice(1, -1)),
+    NORTH: (slice(1, -1), slice(2, None)),
+    SOUTH: (slice(1, -1), slice(None, -2)),
+}
+INNER = (slice(1, -1), slice(1, -1))
+
+
+class ChunkMesh(NamedTuple):
+    vertices: np.ndarray  # (N, 3) float32
+    triangles: np.ndarray  # (N * 6 / 4,) int32, two triangles per face
+    uvs: np.ndarray  # (N, 2) float32
+    colors: np.ndarray  # (N, 4) float32
+
+    def __len__(self) -> int:
+        """Number of faces"""
+        return len(self.vertices) // 4
+
+
+class Faces(NamedTuple):
+    x: np.ndarray
+    y: np.ndarray  # Block level
+    z: np.ndarray
+    side: np.ndarray  # TOP, EAST, ...
+    tile: np.ndarray  # Atlas tile
+
+
+def padded_region(world_map, x_start: int, z_start: int, size: int) -> WorldMap:
+    """Chunk cells plus one neighbour cell on every side, cells outside the world get
+    biome code OUTSIDE"""
+    world_size = world_map.shape[0]
+    x_stop, z_stop = min(x_start + size, world_size), min(z_start + size, world_size)
+    padded = WorldMap(
+        np.full((x_stop - x_start + 2, z_stop - z_start + 2), OUTSIDE, dtype=np.uint8),
+        np.zeros((x_stop - x_start + 2, z_stop - z_start + 2), dtype=np.int16),
+    )
+    x0, x1 = max(x_start - 1, 0), min(x_stop + 1, world_size)
+    z0, z1 = max(z_start - 1, 0), min(z_stop + 1, world_size)
+    region = world_map.region(x0, x1, z0, z1)
+    target = (slice(x0 - x_start + 1, x1 - x_start + 1), slice(z0 - z_start + 1, z1 - z_start + 1))
+    padded.biome[target] = region.biome
+    padded.world_height[target] = region.world_height
+    return padded
+
+
+def column_depths(padded: WorldMap) -> np.ndarray:
+    """Blocks per column of a padded region down to the lowest neighbour, the blocks below are
+    hidden. At least the top block, water columns only have it. Cells outside the world are no
+    neighbours."""
+    height = padded.world_height.astype(np.int32)
+    outside = padded.biome == OUTSIDE
+    inner_height = height[INNER]
+    lowest = inner_height
+    for neighbour in NEIGHBOURS.values():
+        lowest = np.minimum(lowest, np.where(outside[neighbour], inner_height, height[neighbour]))
+    depths = np.maximum(inner_height - lowest, 1)
+    depths[np.isin(padded.biome[INNER], WATER_CODES)] = 1
+    return depths
+
+
+def _column_faces(x, z, y_from, count, side, tile) -> Faces:
+    """Faces of `count` stacked blocks per column starting at level `y_from`"""
+    count = np.maximum(count, 0)
+    total = int(count.sum())
+    starts = np.repeat(np.cumsum(count) - count, count)
+    levels = np.repeat(y_from, count) + np.arange(total) - starts
+    return Faces(
+        np.repeat(x, count),
+        levels,
+        np.repeat(z, count),
+        np.full(total, side),
+        np.repeat(tile, count),
+    )
+
+
+def chunk_faces(padded: WorldMap, x_start: int, z_start: int) -> Tuple[Faces, Faces]:
+    """Visible land faces and water faces of the chunk in a padded region"""
+    biome = padded.biome.astype(np.int32)
+    height = padded.world_height.astype(np.int32)
+    outside = biome == OUTSIDE
+    water = np.isin(biome, WATER_CODES)
+    # Highest solid level per cell, a water block hides the land faces below its surface
+    solid_top = np.where(water, height - 1, height)
+
+    inner_height, inner_biome = height[INNER], biome[INNER]
+    x, z = np.indices(inner_height.shape)
+    x, z = x + x_start, z + z_start
+    # Coarse LOD tiles reach past the world border, their samples there have no faces
+    land, inner_water = ~water[INNER] & ~outside[INNER], water[INNER]
+
+    bottom = inner_height.copy()
+    for neighbour in NEIGHBOURS.values():
+        top = np.where(outside[neighbour], inner_height, solid_top[neighbour] + 1)
+        bottom = np.minimum(bottom, top)
+
+    land_faces = [
+        _column_faces(
+            x[land], z[land], inner_height[land], np.ones_like(x[land]), TOP, inner_biome[land]
+        )
+    ]
+    water_faces = [
+        _column_faces(
+            x[inner_water],
+            z[inner_water],
+            inner_height[inner_water],
+            np.ones_like(x[inner_water]),
+            TOP,
+            inner_biome[inner_water],
+        )
+    ]
+    for side, neighbour in NEIGHBOURS.items():
+        # Blocks above the solid top of the neighbour are visible, all at the world border
+        neighbour_top = np.where(outside[neighbour], np.iinfo(np.int16).min, solid_top[neighbour])
+        y_from = np.maximum(bottom, neighbour_top + 1)
+        count = inner_height - y_from + 1
+        land_faces.append(
+            _column_faces(x[land], z[land], y_from[land], count[land], side, inner_biome[land])
+        )
+        border = inner_water & outside[neighbour]
+        water_faces.append(
+            _column_faces(
+                x[border],
+                z[border],
+                inner_height[border],
+                np.ones_like(x[border]),
+                side,
+                inner_biome[border],
+            )
+        )
+    return _concat(land_faces), _concat(water_faces)
+
+
+def _concat(faces: Sequence[Faces]) -> Faces:
+    return Faces(*(np.concatenate(field) for field in zip(*faces)))
+
+
+def block_tint(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Deterministic brightness per block between 0.95 and 1"""
+    hashed = (x.astype(np.int64) * 73856093) ^ (y.astype(np.int64) * 19349663)
+    hashed ^= z.astype(np.int64) * 83492791
+    return 0.95 + 0.05 * (hashed & 0xFFFF).astype(np.float32) / 0xFFFF
+
+
+def faces_mesh(faces: Faces, y_offset: float = 0) -> ChunkMesh:
+    total = len(faces.x)
+    origin = np.stack([faces.x, faces.y + y_offset, faces.z], axis=1).astype(np.float32)
+    vertices = origin[:, None, :] + FACE_CORNERS[faces.side]
+
+    rects = TILE_RECTS[faces.tile][:, None, :]
+    uvs = rects[..., :2] + FACE_UVS * (rects[..., 2:] - rects[..., :2])
+
+    tint = block_tint(faces.x, faces.y, faces.z)
+    colors = np.ones((total, 4, 4), dtype=np.float32)
+    colors[:, :, :3] = tint[:, None, None]
+
+    triangles = (np.arange(total)[:, None] * 4 + QUAD_TRIANGLES).astype(np.int32)
+    return ChunkMesh(
+        vertices.reshape(-1, 3),
+        triangles.reshape(-1),
+        uvs.reshape(-1, 2).astype(np.float32),
+        colors.reshape(-1, 4),
+    )
+
+
+@timeit
+def build_chunk_meshes(
+    world_map, x_start: int, z_start: int, size: int
+) -> Tuple[ChunkMesh, ChunkMesh]:
+    """Terrain mesh and water mesh of the chunk with lowest cell (x_start, z_start)"""
+    padded = padded_region(world_map, x_start, z_start, size)
+    land_faces, water_faces = chunk_faces(padded, x_start, z_start)
+    return faces_mesh(land_faces), faces_mesh(water_faces, y_offset=WATER_OFFSET)
+
+
+def block_mesh(tile: int, tint: float) -> ChunkMesh:
+    """All six faces of a unit cube centered on the origin like the "cube" model, with the UV
+    rect of atlas tile `tile` and the brightness `tint` in its vertex colors"""
+    zeros = np.zeros(len(FACE_NORMALS), dtype=int)
+    faces = Faces(zeros, zeros, zeros, np.arange(len(FACE_NORMALS)), zeros + tile)
+    mesh = faces_mesh(faces)
+    mesh.vertices[:, [0, 2]] -= 0.5
+    mesh.colors[:, :3] = tint
+    return mesh
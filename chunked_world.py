@@ -0,0 +1,184 @@
+import logging
+import math
+from collections import OrderedDict
+from typing import Tuple, Union
+
+import numpy as np
+
+import conf
+from block import classify_blocks
+from generate_world import NOISE_HEAT, NOISE_HEIGHT_ISLAND, create_circular_map_mask, normalize
+from simplex_noise import snoise3_grid
+from utils import timeit
+from world_map import WorldCell, WorldMap, WorldMapRow
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+ChunkKey = Tuple[int, int]
+
+
+class ChunkedWorldMap:
+    """Island world map generated lazily in square chunks
+
+    Only a strided overview of the noise fields is generated up front. It provides the
+    normalization bounds of the height and heat map and the minimap. Chunks are generated on
+    first access with those global bounds, so chunk borders are seamless, and kept in a LRU
+    cache limited to `cache_bytes`.
+
+    For worlds up to `overview_size` the overview is the full map and the chunks are equal
+    to the map of `convert_to_blocks_map`. For bigger worlds the bounds are estimated from
+    the overview sample.
+    """
+
+    seed: int
+    world_size: int
+    chunk_size: int
+    cache_bytes: int
+    stride: int  # World cells per overview cell
+    overview: WorldMap
+    chunks: "OrderedDict[ChunkKey, WorldMap]"
+    chunks_generated: int = 0
+
+    @timeit
+    def __init__(
+        self,
+        seed: int,
+        world_size: int,
+        chunk_size: int = conf.CHUNK_SIZE,
+        cache_bytes: int = conf.CHUNK_CACHE_MB * 2**20,
+        overview_size: int = conf.CHUNK_OVERVIEW_SIZE,
+    ):
+        self.seed = seed
+        self.world_size = world_size
+        self.chunk_size = chunk_size
+        self.cache_bytes = cache_bytes
+        self.chunks = OrderedDict()
+        self.chunks_generated = 0
+
+        self.stride = stride = math.ceil(world_size / overview_size)
+        sample = np.arange(0, world_size, stride)
+        height_raw = self._noise(sample, sample, NOISE_HEIGHT_ISLAND)
+        heat_raw = self._noise(sample, sample, NOISE_HEAT)
+        self.height_bounds = (np.min(height_raw), np.max(height_raw))
+        self.heat_bounds = (np.min(heat_raw), np.max(heat_raw))
+        height_island = self._island(height_raw, sample, sample)
+        self.island_bounds = (np.min(height_island), np.max(height_island))
+        self.overview = self._classify(height_island, heat_raw)
+        logger.info(f"Chunked world overview {self.overview.shape} with stride {stride}")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.world_size, self.world_size)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    def __len__(self) -> int:
+        return self.world_size
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            return self.cell(*index)
+        if not -self.world_size <= index < self.world_size:
+            raise IndexError(f"Index {index} out of world map with size {self.world_size}")
+        return WorldMapRow(self, index)
+
+    def cell(self, x: int, z: int) -> WorldCell:
+        for index in (x, z):
+            if not -self.world_size <= index < self.world_size:
+                raise IndexError(f"Index {index} out of world map with size {self.world_size}")
+        x, z = x % self.world_size, z % self.world_size
+        chunk = self.get_chunk((x // self.chunk_size, z // self.chunk_size))
+        return chunk.cell(x % self.chunk_size, z % self.chunk_size)
+
+    def take(self, x: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Biome codes and world heights of the cells (x[i], z[i]), indexes must be in the map"""
+        biome = np.zeros(len(x), dtype=np.uint8)
+        world_height = np.zeros(len(x), dtype=np.int16)
+        keys = np.stack([x // self.chunk_size, z // self.chunk_size], axis=1)
+        for key in np.unique(keys, axis=0).tolist():
+            in_chunk = np.all(keys == key, axis=1)
+            chunk = self.get_chunk(tuple(key))
+            biome[in_chunk], world_height[in_chunk] = chunk.take(
+                x[in_chunk] % self.chunk_size, z[in_chunk] % self.chunk_size
+            )
+        return biome, world_height
+
+    def region(self, x_start: int, x_stop: int, z_start: int, z_stop: int) -> WorldMap:
+        """Cells x_start <= x < x_stop and z_start <= z < z_stop, bounds must be in the map"""
+        region = WorldMap.empty((x_stop - x_start, z_stop - z_start))
+        size = self.chunk_size
+        for chunk_x in range(x_start // size, (x_stop - 1) // size + 1):
+            for chunk_z in range(z_start // size, (z_stop - 1) // size + 1):
+                chunk = self.get_chunk((chunk_x, chunk_z))
+                # Overlap of the chunk and the region in world coordinates
+                x0, x1 = max(x_start, chunk_x * size), min(x_stop, (chunk_x + 1) * size)
+                z0, z1 = max(z_start, chunk_z * size), min(z_stop, (chunk_z + 1) * size)
+                source = (
+                    slice(x0 - chunk_x * size, x1 - chunk_x * size),
+                    slice(z0 - chunk_z * size, z1 - chunk_z * size),
+                )
+                target = (slice(x0 - x_start, x1 - x_start), slice(z0 - z_start, z1 - z_start))
+                region.biome[target] = chunk.biome[source]
+                region.world_height[target] = chunk.world_height[source]
+        return region
+
+    def biome_codes(self) -> np.ndarray:
+        """Biome codes of the overview, used for the minimap"""
+        return self.overview.biome_codes()
+
+    def biome_values(self) -> np.ndarray:
+        """Biome values (color names) of the overview, used for the minimap"""
+        return self.overview.biome_values()
+
+    def get_chunk(self, key: ChunkKey) -> WorldMap:
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        chunk = self.generate_chunk(key)
+        self.chunks[key] = chunk
+        self.evict()
+        return chunk
+
+    @timeit
+    def generate_chunk(self, key: ChunkKey) -> WorldMap:
+        rows = np.arange(
+            key[0] * self.chunk_size, min((key[0] + 1) * self.chunk_size, self.world_size)
+        )
+        cols = np.arange(
+            key[1] * self.chunk_size, min((key[1] + 1) * self.chunk_size, self.world_size)
+        )
+        height_raw = self._noise(rows, cols, NOISE_HEIGHT_ISLAND)
+        heat_raw = self._noise(rows, cols, NOISE_HEAT)
+        self.chunks_generated += 1
+        return self._classify(self._island(height_raw, rows, cols), heat_raw)
+
+    def evict(self) -> None:
+        nbytes = self.nbytes
+        while nbytes > self.cache_bytes and len(self.chunks) > 1:
+            _, chunk = self.chunks.popitem(last=False)
+            nbytes -= chunk.nbytes
+
+    def _noise(self, rows: np.ndarray, cols: np.ndarray, params: dict) -> np.ndarray:
+        noises = snoise3_grid(self.shape, z=self.seed, rows=rows, cols=cols, **params)
+        return noises.astype(np.float64)
+
+    def _island(self, height_raw: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Same steps as `combine_maps(height_map, create_circular_map_mask(size))`"""
+        height = normalize(height_raw, bounds=self.height_bounds)
+        height += create_circular_map_mask(self.world_size, rows=rows, cols=cols)
+        return np.maximum(height, 0, out=height)
+
+    def _classify(self, height_island: np.ndarray, heat_raw: np.ndarray) -> WorldMap:
+        height = np.clip(normalize(height_island, bounds=self.island_bounds), 0, 1)
+        heat = np.clip(normalize(heat_raw, bounds=self.heat_bounds), 0, 1)
+        return WorldMap(*classify_blocks(height, heat))
+
+
+AnyWorldMap = Union[WorldMap, ChunkedWorldMap]
+
+
+def use_chunked_world(world_size: int) -> bool:
+    return world_size >= conf.CHUNKED_WORLD_MIN_SIZE
@@ -2,8 +2,33 @@ PLAYER_SPEED = 8
 BLOCKS_RENDER_DISTANCE = 20
 WORLD_SIZE = 500
 ENEMIES_TOTAL = 100
+ENEMY_SPAWN_SPACING = 0  # Minimum distance between spawned enemies, 0 for none
+ENEMY_HASH_CELL_SIZE = 8  # Cell size of the spatial hash for enemy range queries
+FLOW_FIELD_MARGIN = 4  # Cells of the enemy flow field beyond the render distance
 ISLAND_SEED_CLASSIC = 34315
 
 LOGGER_NAME = "game"
 LOGGER_FILE_NAME = "log"
 LOGGER_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+INSTRUMENT = False  # Hot path timers and counters, also toggled in game with F3
+INSTRUMENT_DUMP_FILE = "instrument.json"  # Written in game with F4
+
+WORLD_GEN_WORKERS = 0  # Processes for world generation, 0 uses all CPU cores
+
+WORLD_CACHE_DIR = "maps/cache"
+WORLD_CACHE_MB = 256
+
+WORLD_EDITS_DIR = "maps/edits"  # Placed and removed blocks per world, never evicted
+WORLD_EDITS_FLUSH = 1  # Edits written at once, 1 loses none when the window closes
+
+TERRAIN_CHUNK_MESHES = True  # One mesh per chunk instead of a Block entity per terrain block
+BLOCK_POOL_RINGS = 4  # Blocks kept for reuse, as render circle circumferences of blocks
+MESH_CHUNK_SIZE = 16
+LOD_VIEW_DISTANCE = 144  # Coarse terrain up to here, 0 for none, only with TERRAIN_CHUNK_MESHES
+LOD_RINGS = (48, 96)  # Distances beyond which terrain samples are 4 x 4 and 8 x 8 cells
+
+CHUNK_SIZE = 32
+CHUNK_CACHE_MB = 64
+CHUNK_OVERVIEW_SIZE = 256
+CHUNKED_WORLD_MIN_SIZE = 1000  # Bigger worlds are generated lazily in chunks
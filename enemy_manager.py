@@ -0,0 +1,234 @@
+"""Enemy AI for all enemies at once
+
+The state of every enemy lives in numpy arrays and one vectorized `step` per frame turns the
+enemies to the player, moves them, lets them jump, fall and attack. Only active enemies (the
+ones around the player) are updated, the game writes their new position back to the entities.
+Living enemies are indexed in a spatial hash for range queries. With a flow field the enemies
+walk around cliffs, water and placed blocks instead of straight to the player. Enemies swim
+in water, just below its surface, instead of sinking to the floor below it like the player.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import conf
+from flow_field import FlowField
+from spatial_hash import SpatialHash
+from terrain import TerrainQuery
+from utils import timeit
+
+
+class EnemyStep(NamedTuple):
+    updated: np.ndarray  # Indexes of the enemies that were updated this step
+    attacks: np.ndarray  # Indexes of the enemies attacking the player this step
+
+
+def out_expo(t: np.ndarray) -> np.ndarray:
+    """Same curve as ursina.curve.out_expo"""
+    return np.where(t >= 1, 1, 1 - np.power(2.0, -10 * t))
+
+
+class EnemyManager:
+    # Same behaviour as the old per entity Enemy.update
+    max_hp: int = 100
+    speed: float = 4
+    minimum_attack_distance: float = 2
+    height: float = 2
+    jump_height: float = 1.5
+    jump_up_duration: float = 0.5
+    fall_after: float = 0.35
+    attack_cooldown_time: float = 1.5
+    turn_cooldown_time: float = 0.4
+    probe_distance: float = 0.5
+    swim_depth: float = 0.3  # Below the water surface, like the lowered water mesh
+
+    terrain: TerrainQuery
+    flow_field: Optional[FlowField]
+    positions: np.ndarray  # (N, 3) x, y, z
+    headings: np.ndarray  # (N, 2) unit x, z direction of walking
+    hp: np.ndarray
+    attack_cooldown: np.ndarray  # Seconds until the next attack is possible
+    turn_cooldown: np.ndarray  # Seconds until turning to the player again
+    turn_cells: np.ndarray  # (N, 2) cell of the last turn, enemies turn again in a new cell
+    air_time: np.ndarray
+    jump_time: np.ndarray  # Seconds since the jump started, negative when not jumping
+    jump_start_y: np.ndarray
+    grounded: np.ndarray
+    active: np.ndarray  # Enemies around the player, the others are frozen
+    alive: np.ndarray
+    spatial_hash: SpatialHash
+    hash_cells: np.ndarray  # (N, 2) spatial hash cell of every enemy
+
+    def __init__(
+        self,
+        terrain: TerrainQuery,
+        cell_size: int = conf.ENEMY_HASH_CELL_SIZE,
+        flow_field: Optional[FlowField] = None,
+    ):
+        self.terrain = terrain
+        self.flow_field = flow_field
+        self.spatial_hash = SpatialHash(cell_size)
+        self.positions = np.zeros((0, 3))
+        self.headings = np.zeros((0, 2))
+        self.hp = np.zeros(0, dtype=int)
+        self.attack_cooldown = np.zeros(0)
+        self.turn_cooldown = np.zeros(0)
+        self.turn_cells = np.zeros((0, 2), dtype=int)
+        self.air_time = np.zeros(0)
+        self.jump_time = np.zeros(0)
+        self.jump_start_y = np.zeros(0)
+        self.grounded = np.zeros(0, dtype=bool)
+        self.active = np.zeros(0, dtype=bool)
+        self.alive = np.zeros(0, dtype=bool)
+        self.hash_cells = np.zeros((0, 2), dtype=int)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def add(self, positions: List) -> np.ndarray:
+        """Add enemies at (x, y, z) positions, returns their indexes"""
+        total = len(positions)
+        start = len(self)
+        self.positions = np.concatenate([self.positions, np.reshape(positions, (total, 3))])
+        self.headings = np.concatenate([self.headings, np.tile((0.0, 1.0), (total, 1))])
+        self.hp = np.concatenate([self.hp, np.full(total, self.max_hp)])
+        self.attack_cooldown = np.concatenate(
+            [self.attack_cooldown, np.full(total, self.attack_cooldown_time)]
+        )
+        self.turn_cooldown = np.concatenate([self.turn_cooldown, np.zeros(total)])
+        self.turn_cells = np.concatenate([self.turn_cells, np.full((total, 2), -1)])
+        self.air_time = np.concatenate([self.air_time, np.zeros(total)])
+        self.jump_time = np.concatenate([self.jump_time, np.full(total, -1.0)])
+        self.jump_start_y = np.concatenate([self.jump_start_y, np.zeros(total)])
+        self.grounded = np.concatenate([self.grounded, np.zeros(total, dtype=bool)])
+        self.active = np.concatenate([self.active, np.zeros(total, dtype=bool)])
+        self.alive = np.concatenate([self.alive, np.ones(total, dtype=bool)])
+        indexes = np.arange(start, start + total)
+        self.hash_cells = np.concatenate([self.hash_cells, self._hash_cells(indexes)])
+        for index, (x, _, z) in zip(indexes.tolist(), self.positions[indexes].tolist()):
+            self.spatial_hash.insert(index, x, z)
+        return indexes
+
+    def kill(self, index: int) -> None:
+        self.alive[index] = False
+        self.active[index] = False
+        self.spatial_hash.remove(index)
+
+    def within_disk(self, center: Tuple[int, int], radius: int) -> np.ndarray:
+        """Indexes of the living enemies on the cells of a 2D circle, like points_in_2dcircle"""
+        x, z = center
+        candidates = np.fromiter(
+            self.spatial_hash.query_box(x - radius, x + radius, z - radius, z + radius), dtype=int
+        )
+        cells = np.floor(self.positions[candidates][:, [0, 2]]) - center
+        return np.sort(candidates[(cells**2).sum(axis=1) <= radius**2])
+
+    def rotations_y(self, indexes: np.ndarray) -> np.ndarray:
+        """Entity rotation of the enemies, the model faces away from its walking direction"""
+        headings = self.headings[indexes]
+        return np.degrees(np.arctan2(headings[:, 0], headings[:, 1])) - 180
+
+    @timeit
+    def step(self, dt: float, player_position) -> EnemyStep:
+        indexes = np.flatnonzero(self.active & self.alive)
+        if not len(indexes):
+            return EnemyStep(indexes, indexes)
+        player = np.asarray(player_position, dtype=float)
+        positions = self.positions[indexes]
+        if self.flow_field is not None:
+            self.flow_field.update((int(np.floor(player[0])), int(np.floor(player[2]))))
+
+        self._turn(indexes, positions, player, dt)
+        headings = self.headings[indexes]
+        ahead_x = positions[:, 0] + headings[:, 0] * self.probe_distance
+        ahead_z = positions[:, 2] + headings[:, 1] * self.probe_distance
+        y = positions[:, 1]
+        blocked_feet = self.terrain.are_blocked(ahead_x, y + 0.1, ahead_z)
+        blocked_head = self.terrain.are_blocked(ahead_x, y + self.height - 0.1, ahead_z)
+        distance_to_player = np.linalg.norm(positions - player, axis=1)
+
+        # Same priority as the old if/elif chain
+        near = ~blocked_head & (distance_to_player < self.minimum_attack_distance)
+        attack = near & (self.attack_cooldown[indexes] <= 0)
+        jump = ~blocked_head & ~near & blocked_feet & self.grounded[indexes]
+        walk = ~blocked_head & ~near & ~blocked_feet
+
+        positions[walk, 0] += headings[walk, 0] * self.speed * dt
+        positions[walk, 2] += headings[walk, 1] * self.speed * dt
+        self.attack_cooldown[indexes[attack]] = self.attack_cooldown_time
+        self.jump_time[indexes[jump]] = 0
+        self.jump_start_y[indexes[jump]] = positions[jump, 1]
+        self.grounded[indexes[jump]] = False
+        self.positions[indexes] = positions
+
+        self._jump_and_fall(indexes, dt)
+        self.attack_cooldown[indexes] = np.maximum(0, self.attack_cooldown[indexes] - dt)
+        self._update_spatial_hash(indexes)
+        return EnemyStep(indexes, indexes[attack])
+
+    def _hash_cells(self, indexes: np.ndarray) -> np.ndarray:
+        cells = np.floor(self.positions[indexes][:, [0, 2]]).astype(int)
+        return cells // self.spatial_hash.cell_size
+
+    def _update_spatial_hash(self, indexes: np.ndarray):
+        """Move only the enemies that entered another cell"""
+        cells = self._hash_cells(indexes)
+        moved = np.any(cells != self.hash_cells[indexes], axis=1)
+        self.hash_cells[indexes[moved]] = cells[moved]
+        for index, (x, _, z) in zip(
+            indexes[moved].tolist(), self.positions[indexes[moved]].tolist()
+        ):
+            self.spatial_hash.move(index, x, z)
+
+    def _turn(self, indexes: np.ndarray, positions: np.ndarray, player: np.ndarray, dt: float):
+        self.turn_cooldown[indexes] -= dt
+        turning = self.turn_cooldown[indexes] <= 0
+        targets = np.tile(player[[0, 2]], (len(indexes), 1))
+        if self.flow_field is not None:
+            # Walk to the center of the next cell on the path, close by straight to the player
+            cells = np.floor(positions[:, [0, 2]]).astype(int)
+            turning |= np.any(cells != self.turn_cells[indexes], axis=1)
+            self.turn_cells[indexes] = cells
+            next_cells, found = self.flow_field.next_cells(positions[:, 0], positions[:, 2])
+            distance_to_player = np.linalg.norm(targets - positions[:, [0, 2]], axis=1)
+            follow = found & (distance_to_player >= self.minimum_attack_distance)
+            targets[follow] = next_cells[follow] + 0.5
+        to_target = targets[turning] - positions[turning][:, [0, 2]]
+        length = np.linalg.norm(to_target, axis=1)
+        keep = length > 0
+        turn_indexes = indexes[turning][keep]
+        self.headings[turn_indexes] = to_target[keep] / length[keep, None]
+        self.turn_cooldown[indexes[turning]] = self.turn_cooldown_time
+
+    def _jump_and_fall(self, indexes: np.ndarray, dt: float):
+        jumping = indexes[(0 <= self.jump_time[indexes])]
+        self.jump_time[jumping] += dt
+        rising = jumping[self.jump_time[jumping] < self.fall_after]
+        self.positions[rising, 1] = self.jump_start_y[rising] + self.jump_height * out_expo(
+            self.jump_time[rising] / self.jump_up_duration
+        )
+        self.jump_time[np.setdiff1d(jumping, rising)] = -1
+
+        falling = indexes[self.jump_time[indexes] < 0]
+        positions = self.positions[falling]
+        # Ground below the head, like a ray cast down from there
+        ground = self.terrain.ground_heights(
+            positions[:, 0], positions[:, 2], below=positions[:, 1] + self.height
+        )
+        # Swim, enemies under water float up to the surface
+        x_cells = np.floor(positions[:, 0]).astype(int)
+        z_cells = np.floor(positions[:, 2]).astype(int)
+        water = self.terrain.are_water(x_cells, z_cells)
+        surface = self.terrain.surface_tops(x_cells[water], z_cells[water]) - self.swim_depth
+        ground[water] = np.maximum(ground[water], surface)
+        height_above_ground = positions[:, 1] - ground
+        grounded = height_above_ground <= 0.1
+        self.grounded[falling] = grounded
+        self.air_time[falling[grounded]] = 0
+        in_air = falling[~grounded]
+        # Never fall through the ground on slow frames
+        self.positions[in_air, 1] -= np.minimum(
+            self.air_time[in_air] * dt * 100, height_above_ground[~grounded] - 0.05
+        )
+        self.air_time[in_air] += dt * 0.25
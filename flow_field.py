@@ -0,0 +1,192 @@
+"""Flow field to the player for all enemies at once
+
+The field holds, for every cell in a square window around the player, the cost of the
+cheapest walk to the player. Walking to a neighbour cell costs its distance, more for water,
+and climbing one block costs extra. Water counts at its surface height, enemies swim there
+(see `EnemyManager`) and climb out onto the shore from it. Steps higher than an enemy can jump
+and columns with player placed blocks can not be entered. An enemy follows the field by
+walking to the neighbour cell with the lowest cost, which is O(1) per enemy.
+
+The costs are a shortest path (Dijkstra) distance field, computed by relaxing all cells at
+once with numpy until nothing changes. The field is only recomputed when the player enters
+another cell or placed blocks change. Querying the terrain is the slowest part of that, so the
+ground, water and blocked cells of the window are kept and shifted along when the window moves,
+only the cells that enter the window are queried. The move costs and distances are cheap to
+recompute over the whole window.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+from terrain import TerrainQuery
+from utils import timeit
+
+WATER_COST = 4  # Cost factor of walking through water
+CLIMB_COST = 1  # Extra cost of jumping one block up
+MAX_CLIMB = 1  # Highest step an enemy can jump
+
+# 8 neighbours and their walking distance
+OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+DISTANCES = [1.0] * 4 + [math.sqrt(2)] * 4
+
+
+def _shift(array: np.ndarray, offset: Tuple[int, int], fill) -> np.ndarray:
+    """shifted[x, z] = array[x + offset[0], z + offset[1]], `fill` outside the array"""
+    shifted = np.full_like(array, fill)
+    dx, dz = offset
+    size_x, size_z = array.shape
+    target = (
+        slice(max(0, -dx), min(size_x, size_x - dx)),
+        slice(max(0, -dz), min(size_z, size_z - dz)),
+    )
+    source = (
+        slice(max(0, dx), min(size_x, size_x + dx)),
+        slice(max(0, dz), min(size_z, size_z + dz)),
+    )
+    shifted[target] = array[source]
+    return shifted
+
+
+def move_costs(ground: np.ndarray, water: np.ndarray, blocked: np.ndarray) -> np.ndarray:
+    """(8, X, Z) cost of walking from every cell to each neighbour, inf if impossible"""
+    costs = np.empty((len(OFFSETS),) + ground.shape)
+    for index, (offset, distance) in enumerate(zip(OFFSETS, DISTANCES)):
+        climb = _shift(ground, offset, np.inf) - ground
+        cost = distance * np.where(_shift(water, offset, False), WATER_COST, 1)
+        cost = cost + CLIMB_COST * (climb > 0)
+        cost[(climb > MAX_CLIMB) | _shift(blocked, offset, True)] = np.inf
+        if 0 not in offset:
+            # No cutting corners past cells that can not be entered
+            for corner in ((offset[0], 0), (0, offset[1])):
+                corner_climb = _shift(ground, corner, np.inf) - ground
+                cost[(corner_climb > MAX_CLIMB) | _shift(blocked, corner, True)] = np.inf
+        costs[index] = cost
+    return costs
+
+
+def distance_field(costs: np.ndarray, target: Tuple[int, int]) -> np.ndarray:
+    """Cheapest walk from every cell to the target cell
+
+    Every round relaxes all cells around the cells that improved in the previous round, so the
+    work follows the front growing from the target instead of the whole window.
+    """
+    size_x, size_z = costs.shape[1:]
+    padded = np.full((size_x + 2, size_z + 2), np.inf)
+    padded[target[0] + 1, target[1] + 1] = 0
+    distances = padded[1:-1, 1:-1]
+    x_start, x_stop, z_start, z_stop = target[0], target[0] + 1, target[1], target[1] + 1
+    while True:
+        x_start, x_stop = max(x_start - 1, 0), min(x_stop + 1, size_x)
+        z_start, z_stop = max(z_start - 1, 0), min(z_stop + 1, size_z)
+        region = distances[x_start:x_stop, z_start:z_stop]
+        relaxed = region
+        for (dx, dz), cost in zip(OFFSETS, costs):
+            neighbour = padded[
+                x_start + 1 + dx : x_stop + 1 + dx, z_start + 1 + dz : z_stop + 1 + dz
+            ]
+            relaxed = np.minimum(relaxed, cost[x_start:x_stop, z_start:z_stop] + neighbour)
+        improved = relaxed < region
+        if not improved.any():
+            return distances.copy()
+        rows, cols = np.flatnonzero(improved.any(axis=1)), np.flatnonzero(improved.any(axis=0))
+        region[...] = relaxed
+        x_start, x_stop = x_start + rows[0], x_start + rows[-1] + 1
+        z_start, z_stop = z_start + cols[0], z_start + cols[-1] + 1
+
+
+class FlowField:
+    terrain: TerrainQuery
+    radius: int
+    origin: Tuple[int, int]  # World cell of window cell (0, 0)
+    target: Optional[Tuple[int, int]] = None
+    distances: Optional[np.ndarray] = None
+    costs: Optional[np.ndarray] = None
+    # Terrain of the window cells, (size, size) each
+    ground: np.ndarray
+    water: np.ndarray
+    blocked: np.ndarray
+    recomputed: int = 0
+    cells_queried: int = 0
+
+    def __init__(self, terrain: TerrainQuery, radius: int):
+        self.terrain = terrain
+        self.radius = radius
+        self.origin = (0, 0)
+        self.target = None
+        self.distances = None
+        self.costs = None
+        size = 2 * radius + 1
+        self.ground = np.zeros((size, size))
+        self.water = np.zeros((size, size), dtype=bool)
+        self.blocked = np.zeros((size, size), dtype=bool)
+        self.recomputed = 0
+        self.cells_queried = 0
+        self._terrain_version = -1  # Never equal to the terrain version, all cells are unknown
+
+    @timeit
+    def update(self, target: Tuple[int, int]) -> bool:
+        """Recompute the field for the player in cell `target` if needed"""
+        if target == self.target and self.terrain.version == self._terrain_version:
+            return False
+        self.target = target
+        self._move_window((target[0] - self.radius, target[1] - self.radius))
+        blocked = self.blocked.copy()
+        blocked[self.radius, self.radius] = False  # The player may stand on placed blocks
+        self.costs = move_costs(self.ground, self.water, blocked)
+        self.distances = distance_field(self.costs, (self.radius, self.radius))
+        self.recomputed += 1
+        return True
+
+    def _move_window(self, origin: Tuple[int, int]) -> None:
+        """Shift the terrain of the window to `origin` and query the cells new in the window,
+        all cells after placed blocks changed"""
+        size = 2 * self.radius + 1
+        if self.terrain.version != self._terrain_version:
+            known = np.zeros((size, size), dtype=bool)
+        else:
+            offset = (origin[0] - self.origin[0], origin[1] - self.origin[1])
+            self.ground = _shift(self.ground, offset, 0.0)
+            self.water = _shift(self.water, offset, False)
+            self.blocked = _shift(self.blocked, offset, False)
+            known = _shift(np.ones((size, size), dtype=bool), offset, False)
+        self.origin = origin
+        self._terrain_version = self.terrain.version
+
+        window_x, window_z = np.nonzero(~known)
+        x, z = window_x + origin[0], window_z + origin[1]
+        ground = self.terrain.ground_heights(x, z, below=np.full(len(x), np.inf))
+        water = self.terrain.are_water(x, z)
+        ground[water] = self.terrain.surface_tops(x[water], z[water])
+        blocked = self.terrain.has_placed(x, z)
+        blocked |= ~((0 <= x) & (x < self.terrain.world_size))
+        blocked |= ~((0 <= z) & (z < self.terrain.world_size))
+        self.ground[window_x, window_z] = ground
+        self.water[window_x, window_z] = water
+        self.blocked[window_x, window_z] = blocked
+        self.cells_queried += len(x)
+
+    def next_cells(self, x: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(N, 2) neighbour cell to walk to from the points (x[i], z[i]) and whether there is
+        one, there is none without a path or outside the window"""
+        cell_x, cell_z = np.floor(x).astype(int), np.floor(z).astype(int)
+        cells = np.stack([cell_x, cell_z], axis=1)
+        if self.distances is None or self.costs is None:
+            return cells, np.zeros(len(x), dtype=bool)
+        size = self.distances.shape[0]
+        window_x, window_z = cell_x - self.origin[0], cell_z - self.origin[1]
+        found = (0 <= window_x) & (window_x < size) & (0 <= window_z) & (window_z < size)
+        window_x, window_z = window_x[found], window_z[found]
+        padded = np.pad(self.distances, 1, constant_values=np.inf)
+        walks = np.stack(
+            [
+                cost[window_x, window_z] + padded[window_x + 1 + dx, window_z + 1 + dz]
+                for (dx, dz), cost in zip(OFFSETS, self.costs)
+            ],
+            axis=1,
+        )
+        best = np.argmin(walks, axis=1)
+        cells[found] += np.array(OFFSETS)[best]
+        found[found] = np.isfinite(walks[np.arange(len(best)), best])
+        return cells, found
@@ -1,14 +1,20 @@
 import random
-from typing import Any, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
 
-import noise
 import numpy as np
-from matplotlib import colors
 
-from block import BiomeBlock
-from utils import timeit
+import conf
+import parallel_generation
+from block import BIOMES_BY_CODE, classify_blocks
+from simplex_noise import snoise3_grid
+from utils import Progress, timeit
+from world_map import WorldMap
 
-Map2D = Any  # format List[List[BiomeBlockType]] as numpy array
+Map2D = Any  # format List[List[float]] as numpy array
+
+GENERATOR_VERSION = 1  # Increase when generated worlds change for the same seed
 
 NOISE_HEIGHT = {
     "octaves": 4,
@@ -29,8 +35,9 @@ NOISE_HEAT = {
 }
 
 
-def normalize(data: np.ndarray) -> np.ndarray:
-    return (data - np.min(data)) / (np.max(data) - np.min(data))
+def normalize(data: np.ndarray, bounds: Optional[Tuple[float, float]] = None) -> np.ndarray:
+    low, high = bounds if bounds else (np.min(data), np.max(data))
+    return (data - low) / (high - low)
 
 
 def random_seed(between=[10000, 99999]) -> int:
@@ -39,14 +46,24 @@ def random_seed(between=[10000, 99999]) -> int:
 
 
 @timeit
-def create_circular_map_mask(size: int) -> Map2D:
-    """Map with rounded edges"""
-    x, y = np.meshgrid(np.linspace(-1, 1, size), np.linspace(-1, 1, size))
+def create_circular_map_mask(
+    size: int, rows: Optional[np.ndarray] = None, cols: Optional[np.ndarray] = None
+) -> Map2D:
+    """Map with rounded edges
+
+    `rows` and `cols` select a window of the mask, the normalization bounds are always the
+    ones of the full map so windows fit together seamlessly.
+    """
+    axis = np.linspace(-1, 1, size)
+    rows = np.arange(size) if rows is None else rows
+    cols = np.arange(size) if cols is None else cols
+    x, y = np.meshgrid(axis[cols], axis[rows])
     mask = np.sqrt((x) ** 2 + (y) ** 2)
-    mask = normalize(mask)
+    squares = axis**2
+    mask = normalize(mask, bounds=(np.sqrt(squares.min() * 2), np.sqrt(squares.max() * 2)))
     # Flatten outer circle by setting values above 0.8 to 0.8
-    mask = np.minimum(mask, 0.8, mask)
-    mask = normalize(mask)
+    mask = np.minimum(mask, 0.8, out=mask)
+    mask = normalize(mask, bounds=(0.0, 0.8))
     mask *= -1
     return mask
 
@@ -54,45 +71,96 @@ def create_circular_map_mask(size: int) -> Map2D:
 @timeit
 def combine_maps(map1: Map2D, map2: Map2D) -> Map2D:
     map1 += map2
-    map1 = np.maximum(map1, 0, map1)  # Set values below 0 to 0
+    map1 = np.maximum(map1, 0, out=map1)  # Set values below 0 to 0
     return normalize(np.array(map1))
 
 
 @timeit
-def convert_to_blocks_map(heigth_map: Map2D, heat_map: Map2D) -> Map2D:
-    blocks = [
-        BiomeBlock(height=heigth, heat=heat)
-        for heigth, heat in zip(np.nditer(heigth_map), np.nditer(heat_map))
-    ]
-    return np.array(blocks).reshape(heigth_map.shape)
+def convert_to_blocks_map(
+    heigth_map: Map2D,
+    heat_map: Map2D,
+    workers: int = conf.WORLD_GEN_WORKERS,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> WorldMap:
+    workers = parallel_generation.total_workers(heigth_map.shape[0], workers)
+    if workers > 1:
+        biome, world_height = parallel_generation.blocks_map(heigth_map, heat_map, workers, pool)
+    else:
+        biome, world_height = classify_blocks(heigth_map, heat_map)
+    return WorldMap(biome, world_height)
 
 
 @timeit
-def generate_noise_map(shape: Tuple, seed: int, **params):
-    def _gen_noise(x, y, **params):
-        return noise.snoise3(x / shape[0], y / shape[1], z=seed, **params)
-
-    noises = [_gen_noise(x, y, **params) for y, x in np.ndindex(shape)]
-    return normalize(np.array(noises).reshape(shape))
+def generate_noise_map(
+    shape: Tuple,
+    seed: int,
+    workers: int = conf.WORLD_GEN_WORKERS,
+    progress: Progress = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    **params,
+):
+    """Normalized noise map, cell [y][x] is `noise.snoise3(x / shape[0], y / shape[1], seed)`.
+    Runs on `pool` if given, so several maps can share one pool of workers."""
+    workers = parallel_generation.total_workers(shape[0], workers)
+    if workers > 1:
+        noises = parallel_generation.noise_map(
+            shape, seed, workers, progress=progress, pool=pool, **params
+        )
+    else:
+        noises = snoise3_grid(shape, z=seed, progress=progress, **params)
+    return normalize(noises.astype(np.float64))
+
+
+def world_map_colors(world_map: WorldMap, border=True) -> List[List[Tuple[float, float, float]]]:
+    from matplotlib import colors
 
-
-def world_map_colors(world_map: Map2D, border=True) -> List[List[Tuple[float, float, float]]]:
     def _gen_border(map2d, size, color):
         return np.pad(map2d, pad_width=size, mode="constant", constant_values=color)
 
-    get_biome_value = lambda block: block.biome.value
-    world_map = np.vectorize(get_biome_value)(world_map)
+    biome_map = world_map.biome_values()
 
     if border:
-        world_map = _gen_border(world_map, 1, "gray")
-        world_map = _gen_border(world_map, 5, "goldenrod")
-        world_map = _gen_border(world_map, 2, "gray")
+        biome_map = _gen_border(biome_map, 1, "gray")
+        biome_map = _gen_border(biome_map, 5, "goldenrod")
+        biome_map = _gen_border(biome_map, 2, "gray")
 
-    block_colors = [colors.to_rgb(str(block)) for block in np.nditer(world_map)]
-    world_map_colors = np.array(block_colors).reshape(world_map.shape + (3,))
+    block_colors = [colors.to_rgb(str(block)) for block in np.nditer(biome_map)]
+    world_map_colors = np.array(block_colors).reshape(biome_map.shape + (3,))
     return world_map_colors.tolist()
 
 
+def _palette(names) -> np.ndarray:
+    """uint8 RGB of matplotlib color names, truncated like `plt.imsave` does"""
+    # Imported here, matplotlib takes longer to import than the whole main menu
+    from matplotlib import colors
+
+    return (np.array([colors.to_rgb(name) for name in names]) * 255).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def biome_palette() -> np.ndarray:
+    """uint8 RGB indexed by biome code"""
+    return _palette([biome.value for biome in BIOMES_BY_CODE])
+
+
+BORDERS = ((1, "gray"), (5, "goldenrod"), (2, "gray"))  # Width and color from inside out
+
+
+def world_map_image(world_map, border=True) -> np.ndarray:
+    """uint8 RGB image of the biomes, same pixels as `world_map_colors` saved with imsave"""
+    image = biome_palette()[world_map.biome_codes()]
+    if border:
+        for width, color in BORDERS:
+            image = np.stack(
+                [
+                    np.pad(image[:, :, channel], width, constant_values=value)
+                    for channel, value in enumerate(_palette([color])[0])
+                ],
+                axis=2,
+            )
+    return image
+
+
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
 
@@ -0,0 +1,195 @@
+"""Low overhead timers, counters and histograms for hot paths
+
+Disabled by default, a disabled timer costs one flag check per call. When enabled every timer
+keeps its calls, total, minimum and maximum time and a histogram with power of two buckets of
+nanoseconds, from which percentiles are estimated. Counters are plain named numbers.
+
+    @timed("world.update_blocks")
+    def update_blocks(...):
+        count("world.blocks_added", len(points_add_2d))
+        with span("world.render_blocks"):
+            ...
+
+Turn it on with `enable()` or `conf.INSTRUMENT`, read it with `snapshot()`, `report()` or
+`dump()`. In game F3 shows an overlay and F4 dumps to `conf.INSTRUMENT_DUMP_FILE`.
+"""
+
+import functools
+import json
+import logging
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import conf
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+BUCKETS = 64  # Bucket i holds durations in [2 ** (i - 1), 2 ** i) ns
+PERCENTILES = (50, 95, 99)
+
+ENABLED: bool = conf.INSTRUMENT
+
+
+class Timer:
+    __slots__ = ("calls", "total_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, duration_ns: int) -> None:
+        if not self.calls or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.calls += 1
+        self.total_ns += duration_ns
+        self.buckets[min(duration_ns.bit_length(), BUCKETS - 1)] += 1
+
+    def percentile_ns(self, percent: float) -> int:
+        """Upper bound of the bucket with the percentile, at most the maximum"""
+        rank = percent / 100 * self.calls
+        seen = 0
+        for index, size in enumerate(self.buckets):
+            seen += size
+            if size and seen >= rank:
+                return min(2**index, self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> Dict[str, float]:
+        result = {
+            "calls": self.calls,
+            "total_ms": self.total_ns / 1e6,
+            "mean_ms": self.total_ns / self.calls / 1e6 if self.calls else 0,
+            "min_ms": self.min_ns / 1e6,
+            "max_ms": self.max_ns / 1e6,
+        }
+        for percent in PERCENTILES:
+            result[f"p{percent}_ms"] = self.percentile_ns(percent) / 1e6
+        return result
+
+
+timers: Dict[str, Timer] = dict()
+counters: Dict[str, Union[int, float]] = dict()
+
+
+def enable(enabled: bool = True) -> None:
+    global ENABLED
+    ENABLED = enabled
+
+
+def is_enabled() -> bool:
+    return ENABLED
+
+
+def reset() -> None:
+    timers.clear()
+    counters.clear()
+
+
+def record(name: str, duration_ns: int) -> None:
+    """Add a duration to the timer `name`"""
+    timer = timers.get(name)
+    if timer is None:
+        timer = timers[name] = Timer()
+    timer.add(duration_ns)
+
+
+def observe(name: str, value: float) -> None:
+    """Add a value to the histogram `name`, milliseconds for durations"""
+    if ENABLED:
+        record(name, int(value * 1e6))
+
+
+def count(name: str, value: Union[int, float] = 1) -> None:
+    if ENABLED:
+        counters[name] = counters.get(name, 0) + value
+
+
+def timed(name: Union[str, Callable, None] = None) -> Any:
+    """Decorator that times every call, as `@timed` or `@timed("name")`"""
+
+    def decorate(function: Callable) -> Callable:
+        key = name if isinstance(name, str) else function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(key, perf_counter_ns() - start)
+
+        return wrapper
+
+    if callable(name):
+        return decorate(name)
+    return decorate
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, perf_counter_ns() - self.start)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Context manager that times its block"""
+    return _Span(name) if ENABLED else NO_SPAN
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    return {
+        "timers": {name: timer.summary() for name, timer in sorted(timers.items())},
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def report(limit: Optional[int] = None) -> List[str]:
+    """Lines of the timers by total time and the counters"""
+    lines = list()
+    by_total = sorted(timers.items(), key=lambda item: item[1].total_ns, reverse=True)
+    for name, timer in by_total[:limit]:
+        stats = timer.summary()
+        lines.append(
+            f"{name}: {stats['calls']} calls, total {stats['total_ms']:.1f} ms, "
+            f"p50 {stats['p50_ms']:.2f} p99 {stats['p99_ms']:.2f} max {stats['max_ms']:.2f} ms"
+        )
+    lines.extend(f"{name}: {value}" for name, value in sorted(counters.items()))
+    return lines
+
+
+def dump(file_path: Optional[str] = None) -> None:
+    """Write the snapshot as JSON to `file_path`, or log the report"""
+    if file_path is None:
+        for line in report():
+            logger.info(line)
+        return
+    with open(file_path, "w") as file:
+        json.dump(snapshot(), file, indent=2)
+    logger.info(f"Instrumentation dumped to {file_path}")
@@ -0,0 +1,103 @@
+"""Background loading pipeline
+
+CPU-bound loading stages run one after another on a worker thread. The main thread polls the
+pipeline every frame for the progress and for finished stage results, so the window keeps
+responding and can already create entities while later stages still run.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import conf
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+Results = Dict[str, Any]
+
+
+class LoadingStage(NamedTuple):
+    name: str
+    # Called as func(results, progress), returns the stage result
+    func: Callable[[Results, Callable[[float], None]], Any]
+    weight: float = 1
+
+
+class LoadingCancelled(Exception):
+    pass
+
+
+class LoadingPipeline:
+    stages: List[LoadingStage]
+    results: Results
+    error: Optional[BaseException] = None
+
+    def __init__(self, stages: List[LoadingStage]):
+        self.stages = stages
+        self.results = dict()
+        self.error = None
+        self._lock = threading.Lock()
+        self._weight_done = 0.0
+        self._stage_weight = 0.0
+        self._stage_progress = 0.0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loading", daemon=True)
+
+    def start(self) -> "LoadingPipeline":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        """Stop after the current stage"""
+        self._cancelled.set()
+
+    @property
+    def progress(self) -> float:
+        """Finished fraction of all stages, between 0 and 1"""
+        total_weight = sum(stage.weight for stage in self.stages) or 1
+        with self._lock:
+            done = self._weight_done + self._stage_weight * self._stage_progress
+        return min(1.0, done / total_weight)
+
+    @property
+    def finished(self) -> bool:
+        return not self._thread.is_alive() and self._thread.ident is not None
+
+    def is_done(self, name: str) -> bool:
+        with self._lock:
+            return name in self.results
+
+    def result(self, name: str) -> Any:
+        with self._lock:
+            return self.results[name]
+
+    def raise_error(self) -> None:
+        """Re-raise the error of a failed stage in the calling (main) thread"""
+        if self.error:
+            raise self.error
+
+    def _report(self, fraction: float) -> None:
+        if self._cancelled.is_set():
+            raise LoadingCancelled()
+        with self._lock:
+            self._stage_progress = max(0.0, min(1.0, fraction))
+
+    def _run(self) -> None:
+        try:
+            for stage in self.stages:
+                if self._cancelled.is_set():
+                    raise LoadingCancelled()
+                with self._lock:
+                    self._stage_weight = stage.weight
+                    self._stage_progress = 0.0
+                result = stage.func(self.results, self._report)
+                with self._lock:
+                    self.results[stage.name] = result
+                    self._weight_done += stage.weight
+                    self._stage_weight = 0.0
+                logger.debug(f"Loading stage '{stage.name}' done")
+        except LoadingCancelled:
+            logger.info("Loading cancelled")
+        except Exception as error:
+            logger.exception("Loading failed")
+            self.error = error
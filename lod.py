@@ -0,0 +1,137 @@
+"""Level of detail for terrain beyond the render distance
+
+The world is split in a quadtree of square tiles. A tile of level `l` covers
+`chunk_size * 2 ** l` cells with one sample per `2 ** l` x `2 ** l` cells, so every tile mesh
+has the size of one full resolution chunk. A tile is split in its four children while it is
+within the ring radius of the next finer level. Level 0 tiles are chunks, the chunks in the
+render distance have full cubes and the others one sample per 2 x 2 cells.
+
+A sample has the height and biome of its highest cell. The padding samples around a tile have
+the height of their lowest cell instead, the side faces of the tile border then reach down to
+the terrain of any neighbouring tile and no gaps show between levels.
+"""
+
+from typing import List, NamedTuple, Sequence, Set, Tuple
+
+import numpy as np
+
+from chunk_mesh import OUTSIDE, WATER_OFFSET, ChunkMesh, chunk_faces, faces_mesh
+from utils import Z_2D, X, timeit
+from world_map import WorldMap
+
+
+class LodTile(NamedTuple):
+    level: int  # Tiles of chunk_size * 2 ** level cells, 0 is a chunk
+    x: int  # Tile index at its level
+    z: int
+    detail: int  # Samples of 2 ** detail x 2 ** detail cells, 0 for full cubes
+
+    def cell_size(self, chunk_size: int) -> int:
+        return chunk_size << self.level
+
+    def children(self) -> List["LodTile"]:
+        level, x, z = self.level - 1, self.x * 2, self.z * 2
+        return [LodTile(level, x + dx, z + dz, level) for dx in (0, 1) for dz in (0, 1)]
+
+
+def tile_distance(tile: LodTile, center: Tuple[int, int], chunk_size: int) -> float:
+    """Distance from the center to the nearest cell of the tile"""
+    size = tile.cell_size(chunk_size)
+    nearest = [
+        min(max(center[axis], start * size), (start + 1) * size - 1) - center[axis]
+        for axis, start in ((X, tile.x), (Z_2D, tile.z))
+    ]
+    return (nearest[X] ** 2 + nearest[Z_2D] ** 2) ** 0.5
+
+
+def lod_tiles(
+    center: Tuple[int, int],
+    render_size: int,
+    rings: Sequence[int],
+    view_distance: int,
+    chunk_size: int,
+    world_size: int,
+) -> Set[LodTile]:
+    """Tiles of the world within `view_distance`, with full cubes for the chunks overlapping
+    `render_size` like `chunks_in_2dcircle` and level `l` beyond `rings[l - 2]`"""
+    radii = [render_size, *rings]
+    top = len(radii)
+    size = chunk_size << top
+    last = (world_size - 1) // size
+    tiles: Set[LodTile] = set()
+    stack = [
+        LodTile(top, x, z, top)
+        for x in range(max(center[X] - view_distance, 0) // size, last + 1)
+        for z in range(max(center[Z_2D] - view_distance, 0) // size, last + 1)
+        if x * size <= center[X] + view_distance and z * size <= center[Z_2D] + view_distance
+    ]
+    while stack:
+        tile = stack.pop()
+        if tile.x * tile.cell_size(chunk_size) >= world_size:
+            continue
+        if tile.z * tile.cell_size(chunk_size) >= world_size:
+            continue
+        distance = tile_distance(tile, center, chunk_size)
+        if distance > view_distance:
+            continue
+        if tile.level > 0 and distance <= radii[tile.level - 1]:
+            stack.extend(tile.children())
+        elif tile.level == 0 and distance > render_size:
+            tiles.add(tile._replace(detail=1))
+        else:
+            tiles.add(tile)
+    return tiles
+
+
+def _groups(array: np.ndarray, samples: int, step: int) -> np.ndarray:
+    """(samples, samples, step * step) cells per sample"""
+    grouped = array.reshape(samples, step, samples, step).transpose(0, 2, 1, 3)
+    return grouped.reshape(samples, samples, step * step)
+
+
+def lod_region(world_map, tile: LodTile, chunk_size: int) -> WorldMap:
+    """Samples of the tile plus one padding sample on every side, samples outside the world get
+    biome code OUTSIDE"""
+    step = 1 << tile.detail
+    samples = tile.cell_size(chunk_size) // step + 2
+    cells = samples * step
+    world_size = world_map.shape[0]
+    x_start, z_start = (tile.x * (samples - 2) - 1) * step, (tile.z * (samples - 2) - 1) * step
+    biome = np.full((cells, cells), OUTSIDE, dtype=np.uint8)
+    height = np.zeros((cells, cells), dtype=np.int16)
+    x0, x1 = max(x_start, 0), min(x_start + cells, world_size)
+    z0, z1 = max(z_start, 0), min(z_start + cells, world_size)
+    region = world_map.region(x0, x1, z0, z1)
+    target = (slice(x0 - x_start, x1 - x_start), slice(z0 - z_start, z1 - z_start))
+    biome[target] = region.biome
+    height[target] = region.world_height
+
+    biome, height = _groups(biome, samples, step), _groups(height, samples, step)
+    outside = biome == OUTSIDE
+    highest = np.argmax(np.where(outside, np.iinfo(np.int16).min, height), axis=2)[..., None]
+    sample_biome = np.take_along_axis(biome, highest, axis=2)[..., 0]
+    sample_height = np.take_along_axis(height, highest, axis=2)[..., 0]
+    lowest = np.where(outside, np.iinfo(np.int16).max, height).min(axis=2)
+    padding = np.ones((samples, samples), dtype=bool)
+    padding[1:-1, 1:-1] = False
+    sample_height[padding] = np.where(outside.all(axis=2), 0, lowest)[padding]
+    return WorldMap(sample_biome, sample_height)
+
+
+def _scaled(chunk_mesh: ChunkMesh, step: int) -> ChunkMesh:
+    vertices = chunk_mesh.vertices.copy()
+    vertices[:, [0, 2]] *= step
+    return ChunkMesh(vertices, chunk_mesh.triangles, chunk_mesh.uvs, chunk_mesh.colors)
+
+
+@timeit
+def build_lod_meshes(world_map, tile: LodTile, chunk_size: int) -> Tuple[ChunkMesh, ChunkMesh]:
+    """Terrain mesh and water mesh of a tile, in world cells"""
+    step = 1 << tile.detail
+    samples = tile.cell_size(chunk_size) // step
+    padded = lod_region(world_map, tile, chunk_size)
+    land_faces, water_faces = chunk_faces(padded, tile.x * samples, tile.z * samples)
+    return (
+        _scaled(faces_mesh(land_faces), step),
+        _scaled(faces_mesh(water_faces, y_offset=WATER_OFFSET), step),
+    )
@@ -0,0 +1,150 @@
+"""World generation in row bands on a process pool
+
+Inputs and outputs are numpy arrays in shared memory, workers only receive the names of the
+shared memory blocks and their row band, so no large arrays are pickled. Workers are spawned,
+not forked: the game generates the world on its loading thread, and a fork copies the locks
+other threads of the game hold at that moment, which can deadlock the worker.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import conf
+from block import classify_blocks
+from simplex_noise import snoise3_grid
+from utils import Progress
+
+Band = Tuple[int, int]
+
+BANDS_PER_WORKER = 4
+MIN_BAND_ROWS = 32
+
+
+class SharedArraySpec(NamedTuple):
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SharedArray:
+    """Numpy array in a new shared memory block, freed when leaving the context"""
+
+    def __init__(self, shape: Tuple[int, ...], dtype):
+        dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.array: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        self.spec = SharedArraySpec(self.shm.name, shape, dtype.str)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "SharedArray":
+        shared = cls(array.shape, array.dtype)
+        shared.array[:] = array
+        return shared
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *args) -> None:
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(spec: SharedArraySpec) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=spec.name)
+    return shm, np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+
+
+def _noise_band(out: SharedArraySpec, shape: Tuple, seed: int, band: Band, params: Dict) -> None:
+    shm, noises = _attach(out)
+    noises[band[0] : band[1]] = snoise3_grid(shape, z=seed, rows=np.arange(*band), **params)
+    del noises
+    shm.close()
+
+
+def _classify_band(
+    height: SharedArraySpec,
+    heat: SharedArraySpec,
+    biome: SharedArraySpec,
+    world_height: SharedArraySpec,
+    band: Band,
+) -> None:
+    shms, arrays = zip(*(_attach(spec) for spec in (height, heat, biome, world_height)))
+    height_map, heat_map, biome_map, world_height_map = arrays
+    rows = slice(*band)
+    biome_map[rows], world_height_map[rows] = classify_blocks(height_map[rows], heat_map[rows])
+    del arrays, height_map, heat_map, biome_map, world_height_map
+    for shm in shms:
+        shm.close()
+
+
+def total_workers(rows: int, workers: int = conf.WORLD_GEN_WORKERS) -> int:
+    """Workers worth starting for a map with `rows` rows, 0 workers means all CPU cores"""
+    workers = workers or os.cpu_count() or 1
+    return max(1, min(workers, rows // MIN_BAND_ROWS))
+
+
+def worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool for `noise_map` and `blocks_map`, its processes start at the first task"""
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def split_bands(rows: int, workers: int) -> List[Band]:
+    total_bands = min(rows, workers * BANDS_PER_WORKER)
+    edges = np.linspace(0, rows, total_bands + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def noise_map(
+    shape: Tuple[int, int],
+    seed: int,
+    workers: int,
+    progress: Progress = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    **params,
+) -> np.ndarray:
+    """Parallel `snoise3_grid`, on `pool` or a new pool of `workers` processes"""
+    with ExitStack() as stack:
+        noises = stack.enter_context(SharedArray(shape, np.float32))
+        if pool is None:
+            pool = stack.enter_context(worker_pool(workers))
+        futures = [
+            pool.submit(_noise_band, noises.spec, shape, seed, band, params)
+            for band in split_bands(shape[0], workers)
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            future.result()
+            if progress:
+                progress(done / len(futures))
+        return noises.array.copy()
+
+
+def blocks_map(
+    height_map: np.ndarray,
+    heat_map: np.ndarray,
+    workers: int,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Parallel `classify_blocks`, on `pool` or a new pool of `workers` processes"""
+    shape = height_map.shape
+    with ExitStack() as stack:
+        height = stack.enter_context(SharedArray.from_array(height_map))
+        heat = stack.enter_context(SharedArray.from_array(heat_map))
+        biome = stack.enter_context(SharedArray(shape, np.uint8))
+        world_height = stack.enter_context(SharedArray(shape, np.int16))
+        if pool is None:
+            pool = stack.enter_context(worker_pool(workers))
+        futures = [
+            pool.submit(_classify_band, height.spec, heat.spec, biome.spec, world_height.spec, band)
+            for band in split_bands(shape[0], workers)
+        ]
+        for future in futures:
+            future.result()
+        return biome.array.copy(), world_height.array.copy()
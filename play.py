@@ -1,23 +1,24 @@
 import logging
+import math
 import random
 import sys
 from copy import deepcopy
 from enum import Enum
-from functools import lru_cache
+from functools import lru_cache, partial
 from os import path
-from time import time
-from typing import List, Set, Tuple, Union
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import numpy as np
-from matplotlib import pyplot as plt
+from panda3d.core import NodePath
+from PIL import Image
 from ursina import application
 from ursina.camera import instance as camera
-from ursina.color import color, gray, light_gray, red, yellow
-from ursina.curve import out_expo
+from ursina.color import Color, color, gray, light_gray, red, white, yellow
 from ursina.entity import Entity
-from ursina.hit_info import HitInfo
 from ursina.input_handler import held_keys
 from ursina.main import time as utime
+from ursina.mesh import Mesh
+from ursina.mesh_importer import load_model
 from ursina.models.procedural.grid import Grid
 from ursina.mouse import instance as mouse
 from ursina.prefabs.button import Button
@@ -25,33 +26,65 @@ from ursina.prefabs.editor_camera import EditorCamera
 from ursina.prefabs.first_person_controller import FirstPersonController
 from ursina.prefabs.health_bar import HealthBar
 from ursina.prefabs.sky import Sky
-from ursina.raycaster import raycast
 from ursina.scene import instance as scene
+from ursina.text import Text
+from ursina.texture import Texture
 from ursina.texture_importer import load_texture
-from ursina.ursinamath import distance
 from ursina.ursinastuff import destroy, invoke
 from ursina.vec3 import Vec3
 from ursina.window import instance as window
 
 import conf
-from block import Biomes
+import instrument
+from atlas import PLANK_TILE, load_atlas
+from block import BIOME_CODES, WATER_BIOMES, Biomes
+from chunk_mesh import (
+    ChunkMesh,
+    block_mesh,
+    build_chunk_meshes,
+    column_depths,
+    padded_region,
+)
+from chunked_world import AnyWorldMap, ChunkedWorldMap, use_chunked_world
+from enemy_manager import EnemyManager
+from flow_field import FlowField
 from generate_world import (
     NOISE_HEAT,
     NOISE_HEIGHT_ISLAND,
-    Map2D,
+    biome_palette,
     combine_maps,
     convert_to_blocks_map,
     create_circular_map_mask,
     generate_noise_map,
     random_seed,
-    world_map_colors,
+    world_map_image,
 )
+from loading import LoadingPipeline, LoadingStage
+from lod import LodTile, build_lod_meshes, lod_tiles
 from main_menu import MainMenuUrsina
-from utils import Z_2D, X, Y, Z, points_in_2dcircle, pos_to_xyz, setup_logger, timeit
+from parallel_generation import total_workers, worker_pool
+from pool import Pool
+from spawn import land_cells, plan_spawns
+from terrain import FLOOR_Y, TerrainQuery
+from utils import (
+    Z_2D,
+    X,
+    Y,
+    Z,
+    chunks_in_2dcircle,
+    points_changed_2dcircle,
+    points_in_2dcircle,
+    pos_to_xyz,
+    setup_logger,
+    timeit,
+)
+from world_cache import load_world_map, save_world_map
+from world_edits import EditLog, edit_log_path
 
 # from ursina import *
 
-WATER_BLOCKS = [Biomes.LAKE, Biomes.SEA]
+WATER_BLOCKS = list(WATER_BIOMES)
+BLOCK_TINTS = np.linspace(0.95, 1, 6)  # Brightness levels of blocks
 
 logger = logging.getLogger(conf.LOGGER_NAME)
 
@@ -76,7 +109,7 @@ class Player(FirstPersonController):
         super().__init__()
         self.model = "player"
         self.texture = "player"
-        self.cursor.texture = get_texture("cursor")
+        self.cursor.texture = load_texture(path.join("assets", "cursor.png"))
         self.cursor.scale = 0.02
         self.allow_fly = allow_fly
         self.speed = speed
@@ -150,46 +183,39 @@ class Player(FirstPersonController):
 
 
 class Enemy(Entity):
-    # Based on FirstPersonController but without camera
+    """Enemy entity, its AI runs for all enemies at once in the EnemyManager"""
+
     player_ref: Player
+    manager: EnemyManager
+    index: int  # Index in the arrays of the manager
     health_bar: Entity
-    hp: int
-    max_hp: int = 100
-    speed: int = 4
-    minimum_attack_distance: int = 2
-    height: int = 2
-    jump_height: float = 1.5
-    attack_cooldown_time: float = 1.5
-    turn_cooldown_time: float = 0.4
-    attack_cooldown: float = 0
-    turn_cooldown: float = 0
-    grounded: bool = False
-    jump_up_duration: float = 0.5
-    fall_after: float = 0.35
-    air_time: float = 0
+    max_hp: int = EnemyManager.max_hp
     hp_scale: float = 1.5
     to_be_deleted: bool = False
 
-    def __init__(self, player, position):
-        self.hp = self.max_hp
-        self.attack_cooldown = self.attack_cooldown_time
-        self.turn_cooldown = time()
+    def __init__(self, player, manager: EnemyManager, index: int):
         self.player_ref = player
-        position[Y] += 1
+        self.manager = manager
+        self.index = index
         super().__init__(
             model="enemy",
             texture="enemy",
             scale=0.9,
             collider="mesh",
-            position=position,
+            position=manager.positions[index].tolist(),
         )
         self.health_bar = Entity(
             parent=self, y=2.8, model="cube", color=red, world_scale=(self.hp_scale, 0.1, 0.1)
         )
         self.disable()
 
+    @property
+    def hp(self) -> int:
+        return int(self.manager.hp[self.index])
+
     def delete(self):
         logger.info("Delete Enemy")
+        self.manager.kill(self.index)
         destroy(self.health_bar)
         self.rotation_z = 70
         _destroy = lambda: destroy(self)
@@ -200,106 +226,58 @@ class Enemy(Entity):
         if self.hovered and key == "left mouse down":
             mouse.hovered_entity.hit()
 
-    def update(self):
-        def _raycast(origin):
-            return raycast(origin=origin, direction=self.forward, distance=0.5, ignore=(self,))
-
-        if not self.player_ref.enabled:
-            return  # Bugfix while destroying game
-        if time() - self.turn_cooldown > self.turn_cooldown_time:
-            self.turn_cooldown = time()
-            self.look_at_2d(self.player_ref.position, "y")
-            self.rotation_y -= 180
-        hit_feet: HitInfo = _raycast(origin=self.position + Vec3(0, 0.1, 0))
-        hit_head: HitInfo = _raycast(origin=self.position + Vec3(0, self.height - 0.1, 0))
-        distance_to_player: int = distance(self.player_ref.position, self.position)
-
-        if hit_head.hit and isinstance(hit_head.entity, Block):
-            pass
-        elif distance_to_player < self.minimum_attack_distance:
-            if self.attack_cooldown <= 0:
-                self.attack()
-        elif hit_feet.hit and isinstance(hit_feet.entity, Block):
-            self.jump()
-        else:
-            # Move backward to correct model facing direction
-            self.position += self.back * self.speed * utime.dt
-
-        self.update_gravity()
-        self.health_bar.alpha = max(0, self.health_bar.alpha - utime.dt)
-        self.attack_cooldown = max(0, self.attack_cooldown - utime.dt)
-
-    def update_gravity(self):
-        hit_down: HitInfo = raycast(
-            origin=self.world_position + (0, self.height, 0),
-            direction=self.down,
-            ignore=tuple(e for e in scene.entities if isinstance(e, Enemy)),
-        )
-        if hit_down.distance <= self.height + 0.1:
-            self.grounded = True
-            self.air_time = 0
-        else:
-            self.grounded = False
-            self.y -= min(self.air_time, hit_down.distance - 0.05) * utime.dt * 100
-            self.air_time += utime.dt * 0.25
-
-    def jump(self):
-        if not self.grounded:
-            return
-        if self.to_be_deleted:
-            return  # Prevent invoke function when going to be deleted
-        self.grounded = False
-        self.animate_y(
-            self.y + self.jump_height,
-            self.jump_up_duration,
-            resolution=int(1 // utime.dt),
-            curve=out_expo,
-        )
-        invoke(self.y_animator.pause, delay=self.fall_after)
+    def sync(self, position: List[float], rotation_y: float, dt: float):
+        """Show the state of the manager"""
+        self.position = position
+        self.rotation_y = rotation_y
+        if self.health_bar.alpha > 0:
+            self.health_bar.alpha = max(0, self.health_bar.alpha - dt)
 
     def attack(self):
         logger.info("Enemy attack")
         self.blink(yellow, duration=0.3)
         self.shake()
         self.player_ref.hit()
-        self.attack_cooldown = self.attack_cooldown_time
 
     def hit(self, damage=20):
         self.blink(red, duration=0.3)
-        self.hp -= damage
+        self.manager.hp[self.index] -= damage
         self.health_bar.world_scale_x = self.hp / self.max_hp * self.hp_scale
         self.health_bar.alpha = 1
 
 
 @lru_cache(maxsize=None)
-def get_texture(name: Union[str, None]):
-    get_file = lambda name: path.join("assets", name)
-    if name == Biomes.SEA:
-        return load_texture(get_file("sea.png"))
-    elif name == Biomes.LAKE:
-        return load_texture(get_file("water.png"))
-    elif name == Biomes.DESERT:
-        return load_texture(get_file("sand.png"))
-    elif name == Biomes.SAVANNA:
-        return load_texture(get_file("savanna.png"))
-    elif name == Biomes.PLANE:
-        return load_texture(get_file("grass.png"))
-    elif name == Biomes.HILL:
-        return load_texture(get_file("grass_stone.png"))
-    elif name == Biomes.MOUNTAIN:
-        return load_texture(get_file("stone.png"))
-    elif name == Biomes.MOUNTAIN_SNOW:
-        return load_texture(get_file("snow.png"))
-    elif name == "cursor":
-        return load_texture(get_file("cursor.png"))
-    elif name == None:
-        return load_texture(get_file("plank.png"))
-
-
-class Block(Button):
-    destroyable: bool = False
+def get_atlas_texture() -> Texture:
+    """The block texture atlas, shared by all blocks and chunks"""
+    texture = Texture(load_atlas()[0])
+    texture.filtering = None
+    return texture
+
+
+@lru_cache(maxsize=None)
+def get_block_mesh(tile: int, tint: int) -> Mesh:
+    return to_mesh(block_mesh(tile, BLOCK_TINTS[tint]))
+
+
+def block_model(tile: int, tint: int) -> NodePath:
+    """Node with the shared cube geometry of an atlas tile and tint level"""
+    return NodePath(get_block_mesh(tile, tint).geomNode.makeCopy())
+
+
+class ClickTarget:
+    """Entity whose clicks are handled by World.block_click_handler"""
+
     destroy: bool = False
     create_position = None
+    dirty_blocks: Optional[Set["ClickTarget"]] = None
+
+    def mark_dirty(self):
+        if self.dirty_blocks is not None:
+            self.dirty_blocks.add(self)
+
+
+class Block(ClickTarget, Button):
+    destroyable: bool = False
     fix_pos: int
 
     def __init__(
@@ -308,28 +286,39 @@ class Block(Button):
         biome: str,
         fix_pos=0.5,
         destroyable=False,
+        dirty_blocks: Optional[Set[ClickTarget]] = None,
+    ):
+        super().__init__(parent=scene, model=None, scale=1, highlight_color=light_gray)
+        self.retarget(position, biome, fix_pos, destroyable, dirty_blocks)
+
+    def retarget(
+        self,
+        position: List[int],
+        biome: str,
+        fix_pos=0.5,
+        destroyable=False,
+        dirty_blocks: Optional[Set[ClickTarget]] = None,
     ):
+        """Turn this block into another one, for new and pooled blocks alike"""
         self.fix_pos = fix_pos
         self.biome = biome
         self.destroyable = destroyable
-        position = list(position)
-        position[X] += self.fix_pos
-        position[Z] += self.fix_pos
-        texture = get_texture(self.biome if not self.create_position else None)
-        super().__init__(
-            parent=scene,
-            position=position,
-            model="cube",
-            texture=texture,
-            scale=1,
-            color=color(0, 0, random.uniform(0.95, 1)),
-            highlight_color=light_gray,
-        )
-        if self.biome in WATER_BLOCKS:
-            self.collider = None
+        self.dirty_blocks = dirty_blocks
+        self.destroy = False
+        self.create_position = None
+        x, y, z = position
+        self.position = Vec3(x + self.fix_pos, y, z + self.fix_pos)
+        # Blocks differ only in vertex data, they all share one texture and color state
+        tile = PLANK_TILE if self.biome is None else BIOME_CODES[Biomes(self.biome)]
+        self.model = block_model(tile, random.randrange(len(BLOCK_TINTS)))
+        self.texture = get_atlas_texture()
+        self.color = white
+        # The box collider is kept, water blocks only stash it
+        self.collision = self.biome not in WATER_BLOCKS
 
     def delete(self):
         self.destroy = True
+        self.mark_dirty()
 
     def get_map_position(self) -> Tuple[int, int, int]:
         return (
@@ -344,6 +333,65 @@ class Block(Button):
                 self.delete()
             if key == "right mouse down" and self.biome not in WATER_BLOCKS:
                 self.create_position = self.position + mouse.normal
+                self.mark_dirty()
+
+
+def to_mesh(chunk_mesh: ChunkMesh) -> Mesh:
+    return Mesh(
+        # Tuples, MeshCollider can not read list vertices
+        vertices=list(map(tuple, chunk_mesh.vertices.tolist())),
+        triangles=chunk_mesh.triangles.tolist(),
+        uvs=chunk_mesh.uvs.tolist(),
+        colors=[Color(*rgba) for rgba in chunk_mesh.colors.tolist()],
+        static=True,
+    )
+
+
+class TerrainChunk(ClickTarget, Entity):
+    """Terrain blocks of a square chunk as one mesh, water is a child mesh without collider"""
+
+    key: Tuple[int, int]
+    water: Optional[Entity] = None
+
+    def __init__(
+        self,
+        world_map2d: AnyWorldMap,
+        key: Tuple[int, int],
+        size: int,
+        dirty_blocks: Optional[Set[ClickTarget]] = None,
+    ):
+        self.key = key
+        self.dirty_blocks = dirty_blocks
+        terrain, water = build_chunk_meshes(world_map2d, key[X] * size, key[Z_2D] * size, size)
+        super().__init__(parent=scene, model=to_mesh(terrain), texture=get_atlas_texture())
+        if len(terrain):
+            self.collider = "mesh"
+        if len(water):
+            self.water = Entity(parent=self, model=to_mesh(water), texture=get_atlas_texture())
+
+    def input(self, key):
+        if self.hovered and key == "right mouse down":
+            normal = Vec3(*(round(axis) for axis in mouse.world_normal))
+            point = mouse.world_point - normal * 0.5  # Inside the clicked block
+            block_position = Vec3(
+                math.floor(point.x) + 0.5, round(point.y), math.floor(point.z) + 0.5
+            )
+            self.create_position = block_position + normal
+            self.mark_dirty()
+
+
+class LodChunk(Entity):
+    """Coarse terrain of a tile beyond the render distance, without collider"""
+
+    tile: LodTile
+    water: Optional[Entity] = None
+
+    def __init__(self, world_map2d: AnyWorldMap, tile: LodTile, chunk_size: int):
+        self.tile = tile
+        terrain, water = build_lod_meshes(world_map2d, tile, chunk_size)
+        super().__init__(parent=scene, model=to_mesh(terrain), texture=get_atlas_texture())
+        if len(water):
+            self.water = Entity(parent=self, model=to_mesh(water), texture=get_atlas_texture())
 
 
 class MiniMap:
@@ -351,9 +399,8 @@ class MiniMap:
     player_icon: Entity
     world_size: int
 
-    def __init__(self, world_map2d, seed, world_size):
+    def __init__(self, seed, world_size):
         self.world_size = world_size
-        self.save_minimap(world_map2d, seed)
         self.map = Entity(
             parent=camera.ui,
             model="quad",
@@ -383,37 +430,70 @@ class MiniMap:
         self.player_icon.x = x / self.world_size * self.player_icon_max
         self.player_icon.y = z / self.world_size * self.player_icon_max - self.player_icon_max
 
+    @staticmethod
     @timeit
-    def save_minimap(self, world_map2d, seed):
+    def save_minimap(world_map2d, seed):
         """Save minimap as PNG image"""
-        path = self.get_minimap_path(seed)
-        img = np.rot90(np.array(world_map_colors(world_map2d)))
-        plt.imsave(path, img)
+        path = MiniMap.get_minimap_path(seed)
+        img = np.rot90(world_map_image(world_map2d))
+        # RGBA like plt.imsave wrote it
+        Image.fromarray(img).convert("RGBA").save(path)
 
-    def get_minimap_path(self, seed):
+    @staticmethod
+    def get_minimap_path(seed):
         return path.join("maps", f"seed_{seed}.png")
 
 
 class World:
     render_size: int
     player: Player
-    world_map2d: Map2D
+    world_map2d: AnyWorldMap
     world_size: int
     position_start: List[int]
-    enemies: List[Enemy] = list()
-    blocks: List[Block] = list()
+    enemies: List[Enemy]
+    enemies_by_index: Dict[int, Enemy]  # Living enemies by index in the enemy manager
+    flow_field: FlowField
+    enemy_manager: EnemyManager
+    terrain: TerrainQuery
+    columns: Dict[Tuple[int, int], List[Block]]  # Rendered blocks per (x, z) column
+    block_pool: Pool[Block]  # Disabled blocks that left the render circle, reused for new ones
+    block_pool_root: Entity
+    chunks: Dict[Tuple[int, int], TerrainChunk]  # Rendered terrain meshes per chunk key
+    lod_chunks: Dict[LodTile, LodChunk]  # Coarse terrain meshes beyond the render distance
+    column_depths: Dict[Tuple[int, int], np.ndarray]  # Blocks per column, per chunk in view
+    dirty_blocks: Set[ClickTarget]  # Blocks and chunks clicked since the last block_click_handler
+    edits: EditLog  # Placed and removed blocks, replayed when their column comes into view
 
-    def __init__(self, world_map2d: Map2D, world_size: int, render_size: int):
+    def __init__(
+        self,
+        world_map2d: AnyWorldMap,
+        world_size: int,
+        render_size: int,
+        edits: Optional[EditLog] = None,
+    ):
         logger.info("Initialize World")
+        self.edits = edits if edits is not None else EditLog()
+        self.columns = dict()
+        self.column_depths = dict()
+        self.chunks = dict()
+        self.lod_chunks = dict()
+        self.dirty_blocks = set()
+        self.block_pool = Pool(self.block_pool_size(render_size), discard=destroy)
+        self.block_pool_root = Entity(enabled=False)
         self.world_map2d = world_map2d
         self.world_size = world_size
         self.render_size = render_size
+        self.terrain = TerrainQuery(self.world_map2d, self.world_size)
+        self.flow_field = FlowField(self.terrain, radius=render_size + conf.FLOW_FIELD_MARGIN)
+        self.enemy_manager = EnemyManager(self.terrain, flow_field=self.flow_field)
+        self.enemies = list()
+        self.enemies_by_index = dict()
         self.hidden_floor = Entity(
             model=Grid(1, 1),
             rotation_x=90,
             collider="box",
             scale=self.world_size * 2,
-            position=(0, -1.9, 0),
+            position=(0, FLOOR_Y, 0),
             visible=False,
         )
         self.position_start = self.random_island_position(self.world_map2d, self.world_size)
@@ -422,23 +502,17 @@ class World:
     def init_player(self, speed, allow_fly=False):
         self.player = Player(position_start=self.position_start, speed=speed, allow_fly=True)
 
-    def init_enemies(self, total_enemies=1):
-        positions_taken = points_in_2dcircle(
-            radius=self.render_size,
-            x_offset=int(self.player.position[X]),
-            y_offset=int(self.player.position[Z]),
+    def init_enemies(self, total_enemies=1, seed=0, min_spacing=conf.ENEMY_SPAWN_SPACING):
+        cells, heights = land_cells(self.world_map2d)
+        center = (int(self.player.position[X]), int(self.player.position[Z]))
+        spawns = plan_spawns(cells, total_enemies, seed, center, self.render_size, min_spacing)
+        positions = np.column_stack(
+            [cells[spawns, 0] + 0.5, heights[spawns] + 1, cells[spawns, 1] + 0.5]
         )
-        for _ in range(total_enemies):
-            try_count = 0
-            while try_count < 10:
-                position = self.random_island_position(self.world_map2d, self.world_size)
-                position_2d = (position[X] + 0.5, position[Z] + 0.5)
-                if position_2d not in positions_taken:
-                    self.enemies.append(Enemy(player=self.player, position=position))
-                    positions_taken.add(position_2d)
-                    break
-            try_count += 1
-        print(positions_taken)
+        for index in self.enemy_manager.add(positions).tolist():
+            enemy = Enemy(player=self.player, manager=self.enemy_manager, index=index)
+            self.enemies.append(enemy)
+            self.enemies_by_index[index] = enemy
 
     def delete(self):
         logger.info("Delete World")
@@ -447,93 +521,222 @@ class World:
         for enemy in self.enemies:
             enemy.delete()
         self.enemies = list()
-        for block in self.blocks:
-            block.delete()
-        self.blocks = list()
+        self.enemies_by_index = dict()
+        for blocks in self.columns.values():
+            for block in blocks:
+                destroy(block)
+        self.columns = dict()
+        self.block_pool.clear()
+        destroy(self.block_pool_root)
+        for chunk in self.chunks.values():
+            destroy(chunk)
+        self.chunks = dict()
+        for lod_chunk in self.lod_chunks.values():
+            destroy(lod_chunk)
+        self.lod_chunks = dict()
+        self.dirty_blocks = set()
+        self.edits.flush()
 
+    @timeit
     def update_enemies(self):
         for enemy in reversed(self.enemies):
             if enemy.hp <= 0 and enemy.to_be_deleted == False:
                 self.enemies.remove(enemy)
+                del self.enemies_by_index[enemy.index]
                 enemy.delete()
+        if application.paused:
+            return
+        dt = utime.dt
+        step = self.enemy_manager.step(dt, self.player.position)
+        positions = self.enemy_manager.positions[step.updated].tolist()
+        rotations = self.enemy_manager.rotations_y(step.updated).tolist()
+        for index, position, rotation_y in zip(step.updated.tolist(), positions, rotations):
+            self.enemies_by_index[index].sync(position, rotation_y, dt)
+        instrument.count("World.enemies_updated", len(step.updated))
+        for index in step.attacks.tolist():
+            self.enemies_by_index[index].attack()
 
+    @timeit
     def update_positions(self, player_position_new, player_position_old):
-        points_wanted_2d = points_in_2dcircle(
-            radius=self.render_size,
-            x_offset=int(player_position_new[X]),
-            y_offset=int(player_position_new[Z]),
-        )
-        points_current_2d = set()
+        center_new = (int(player_position_new[X]), int(player_position_new[Z]))
         if player_position_old:
-            points_current_2d = points_in_2dcircle(
-                radius=self.render_size,
-                x_offset=int(player_position_old[X]),
-                y_offset=int(player_position_old[Z]),
+            center_old = (int(player_position_old[X]), int(player_position_old[Z]))
+            points_add_2d, points_del_2d = points_changed_2dcircle(
+                self.render_size, center_old, center_new
             )
-        self.update_blocks(points_wanted_2d, points_current_2d)
-        self.update_enemies_enabled(points_wanted_2d)
+        else:
+            points_add_2d, points_del_2d = points_in_2dcircle(self.render_size, *center_new), set()
+        self.update_blocks(points_add_2d, points_del_2d)
+        if conf.TERRAIN_CHUNK_MESHES:
+            self.update_chunks(center_new)
+        self.update_enemies_enabled(center_new)
 
+    @timeit
     def update_blocks(
-        self, points_wanted_2d: Set[Tuple[int, int]], points_current_2d: Set[Tuple[int, int]]
+        self, points_add_2d: Set[Tuple[int, int]], points_del_2d: Set[Tuple[int, int]]
     ):
-        points_del_2d = points_current_2d.difference(points_wanted_2d)
-        for block in reversed(self.blocks):
-            x, _, z = block.get_map_position()
-            if any(x == point[X] and z == point[Z_2D] for point in points_del_2d):
-                self.blocks.remove(block)
-                destroy(block)
+        for point in points_del_2d:
+            for block in self.columns.pop(point, []):
+                self.dirty_blocks.discard(block)
+                if block.destroyable:
+                    self.terrain.remove_block(*block.get_map_position())
+                self.release_block(block)
+
+        if not conf.TERRAIN_CHUNK_MESHES:
+            instrument.count("World.columns_added", len(points_add_2d))
+            instrument.count("World.columns_removed", len(points_del_2d))
+            self.update_column_depths(points_add_2d)
+            with instrument.span("World.render_blocks"):
+                for point in points_add_2d:
+                    self.render_column(point[X], point[Z_2D])
+        self.replay_edits(points_add_2d)
+        logger.debug(f"Total block columns {len(self.columns)}")
+
+    def replay_edits(self, points_2d: Set[Tuple[int, int]]):
+        """Placed blocks of the columns `points_2d`, only chunks with edits are looked at"""
+        keys = {self.edits.key(*point) for point in points_2d} & self.edits.chunks.keys()
+        for key in keys:
+            for x, y, z in self.edits.placed(key).tolist():
+                if (x, z) in points_2d:
+                    instrument.count("World.edits_replayed")
+                    self.add_block(self.new_block((x, y, z), biome=None, destroyable=True))
 
-        points_add_2d = points_wanted_2d.difference(points_current_2d)
-        for point in points_add_2d:
-            self.render_block(position=[point[X], -1, point[Z_2D]])
-        logger.debug(f"Total blocks {len(self.blocks)}")
+    @timeit
+    def update_chunks(self, center: Tuple[int, int]):
+        """Terrain meshes for all chunks overlapping the render circle, and coarser meshes
+        beyond it up to conf.LOD_VIEW_DISTANCE"""
+        chunk_size = conf.MESH_CHUNK_SIZE
+        if conf.LOD_VIEW_DISTANCE > self.render_size:
+            tiles = lod_tiles(
+                center,
+                self.render_size,
+                conf.LOD_RINGS,
+                conf.LOD_VIEW_DISTANCE,
+                chunk_size,
+                self.world_size,
+            )
+            keys_wanted = {(tile.x, tile.z) for tile in tiles if tile.detail == 0}
+            self.update_lod_chunks({tile for tile in tiles if tile.detail > 0})
+        else:
+            keys_wanted = chunks_in_2dcircle(self.render_size, center, chunk_size, self.world_size)
+        for key in set(self.chunks) - keys_wanted:
+            chunk = self.chunks.pop(key)
+            self.dirty_blocks.discard(chunk)
+            destroy(chunk)
+        for key in keys_wanted - set(self.chunks):
+            instrument.count("World.chunks_built")
+            self.chunks[key] = TerrainChunk(
+                self.world_map2d, key, chunk_size, dirty_blocks=self.dirty_blocks
+            )
 
-    def update_enemies_enabled(self, points_current_2d: Set[Tuple[int, int]]):
-        for enemy in self.enemies:
-            x, _, z = pos_to_xyz(enemy.position)
-            if any(x == point[X] and z == point[Z_2D] for point in points_current_2d):
-                enemy.enable()
+    def update_lod_chunks(self, tiles_wanted: Set[LodTile]):
+        """Only the tiles that changed level are built, mostly a ring at the edges"""
+        for tile in set(self.lod_chunks) - tiles_wanted:
+            destroy(self.lod_chunks.pop(tile))
+        for tile in tiles_wanted - set(self.lod_chunks):
+            instrument.count("World.lod_chunks_built")
+            self.lod_chunks[tile] = LodChunk(self.world_map2d, tile, conf.MESH_CHUNK_SIZE)
+
+    @property
+    def blocks(self) -> List[Block]:
+        return [block for blocks in self.columns.values() for block in blocks]
+
+    def add_block(self, block: Block):
+        x, y, z = block.get_map_position()
+        self.columns.setdefault((x, z), []).append(block)
+        if block.destroyable:
+            self.terrain.add_block(x, y, z)
+
+    def remove_block(self, block: Block):
+        x, y, z = block.get_map_position()
+        column = self.columns.get((x, z), [])
+        if block in column:
+            column.remove(block)
+            if not column:
+                del self.columns[(x, z)]
+        if block.destroyable:
+            self.terrain.remove_block(x, y, z)
+        self.release_block(block)
+
+    @staticmethod
+    def block_pool_size(render_size: int) -> int:
+        """Pool high-water mark, blocks of `conf.BLOCK_POOL_RINGS` render circle borders"""
+        return math.ceil(conf.BLOCK_POOL_RINGS * 2 * math.pi * render_size)
+
+    def new_block(self, position, biome, fix_pos=0.5, destroyable=False) -> Block:
+        block = self.block_pool.acquire()
+        if block is None:
+            instrument.count("World.blocks_created")
+            return Block(position, biome, fix_pos, destroyable, dirty_blocks=self.dirty_blocks)
+        instrument.count("World.blocks_reused")
+        block.parent = scene
+        block.retarget(position, biome, fix_pos, destroyable, dirty_blocks=self.dirty_blocks)
+        block.enable()
+        return block
+
+    def release_block(self, block: Block):
+        block.disable()
+        block.parent = self.block_pool_root
+        self.block_pool.release(block)
+
+    @timeit
+    def update_enemies_enabled(self, center: Tuple[int, int]):
+        """Enable the enemies in the render circle, only the changed ones are touched"""
+        manager = self.enemy_manager
+        inside = set(manager.within_disk(center, self.render_size).tolist())
+        active = set(np.flatnonzero(manager.active).tolist())
+        for index in inside - active:
+            self.enemies_by_index[index].enable()
+        for index in active - inside:
+            self.enemies_by_index[index].disable()
+        manager.active[:] = False
+        manager.active[list(inside)] = True
+
+    def update_column_depths(self, points_2d: Set[Tuple[int, int]]):
+        """Column depths of the chunks with columns in `points_2d`, the others are dropped"""
+        size = conf.MESH_CHUNK_SIZE
+        depths = dict()
+        for key in {(x // size, z // size) for x, z in points_2d}:
+            if key in self.column_depths:
+                depths[key] = self.column_depths[key]
             else:
-                enemy.disable()
+                padded = padded_region(self.world_map2d, key[X] * size, key[Z_2D] * size, size)
+                depths[key] = column_depths(padded)
+        self.column_depths = depths
 
-    def render_block(self, position):
-        x, y, z = pos_to_xyz(position)
-        if not all([0 <= pos < self.world_size for pos in (x, z)]):
+    def render_column(self, x: int, z: int):
+        """Top block of the column and the blocks below it that can be seen from the side"""
+        if not (0 <= x < self.world_size and 0 <= z < self.world_size):
             return  # Skip if outside of world
-        biome = self.world_map2d[x][z].biome
-        if y == -1:
-            y = self.world_map2d[x][z].world_height
+        size = conf.MESH_CHUNK_SIZE
+        depth = int(self.column_depths[(x // size, z // size)][x % size, z % size])
+        biome, y = self.world_map2d[x][z]
         if biome in WATER_BLOCKS:
             y -= 0.3
-        self.blocks.append(Block(position=(x, y, z), biome=biome))
-        if biome not in WATER_BLOCKS:
-            self.fill_block_below((x, y, z))
-
-    def fill_block_below(self, position):
-        x, y, z = pos_to_xyz(position)
-        blocks_around = []
-        for x_diff, z_diff in [[1, 0], [-1, 0], [0, 1], [0, -1]]:
-            try:
-                blocks_around.append(self.world_map2d[x + x_diff][z + z_diff])
-            except IndexError:
-                continue  # Skip if outside of world
-        if any(y - block.world_height > 1 for block in blocks_around):
-            self.render_block(position=(x, y - 1, z))
+        instrument.count("World.render_block", depth)
+        for level in range(depth):
+            self.add_block(self.new_block(position=(x, y - level, z), biome=biome))
 
+    @timeit
     def block_click_handler(self):
-        for block in reversed(self.blocks):
+        if not self.dirty_blocks:
+            return
+        dirty_blocks = list(self.dirty_blocks)
+        self.dirty_blocks.clear()  # Same set object, the blocks keep a reference to it
+        for block in dirty_blocks:
             if block.destroy:
-                self.blocks.remove(block)
-                destroy(block)
+                self.edits.remove(*block.get_map_position())
+                self.remove_block(block)
             elif block.create_position:
-                new_block = Block(
+                new_block = self.new_block(
                     position=block.create_position, biome=None, fix_pos=0, destroyable=True
                 )
-                self.blocks.append(new_block)
+                self.add_block(new_block)
+                self.edits.place(*new_block.get_map_position())
                 block.create_position = None
 
     @staticmethod
-    def random_island_position(world_map2d: Map2D, world_size: int) -> List[int]:
+    def random_island_position(world_map2d: AnyWorldMap, world_size: int) -> List[int]:
         while True:
             x = random.randint(1, world_size - 1)
             z = random.randint(1, world_size - 1)
@@ -544,17 +747,72 @@ class World:
                 return position
 
 
+class InstrumentOverlay(Entity):
+    """Instrumentation report in the top right corner, refreshed twice per second"""
+
+    refresh_time: float = 0.5
+    lines: int = 16
+
+    def __init__(self):
+        super().__init__(parent=camera.ui, ignore_paused=True)
+        self.report = Text(
+            parent=self,
+            position=window.top_right,
+            origin=(0.5, 0.5),
+            scale=0.6,
+            background=True,
+        )
+        self.time_left = 0.0
+
+    def update(self):
+        self.time_left -= utime.dt
+        if self.time_left <= 0:
+            self.time_left = self.refresh_time
+            self.report.text = "\n".join(instrument.report(limit=self.lines)) or "No data yet"
+
+
 class UrsinaMC(MainMenuUrsina):
-    world_map2d: Map2D = None
-    world = None
+    world_map2d: Optional[AnyWorldMap] = None
+    world: Optional[World] = None
     minimap = None
     game_background = None
-    loading_step: int = 0
-    spectate_camera: Entity = EditorCamera(enabled=False, ignore_paused=True)
+    loading_bar = None
+    loading_pipeline: Optional[LoadingPipeline] = None
+    loading_steps: List[Tuple[str, Callable]] = list()
+    loading_steps_total: int = 0
+    world_map_generated: bool = False
+    spectate_camera: Optional[EditorCamera] = None
+    instrument_overlay: Optional[InstrumentOverlay] = None
+    warm_up_pipeline: Optional[LoadingPipeline] = None
+    warm_up_steps: List[Callable] = list()
+    menu_frames: int = 0
 
     def __init__(self):
         super().__init__()
         self.game_state = GameState.MAIN_MENU
+        # Load what a game needs while the main menu is shown, see startup.py
+        self.warm_up_pipeline = LoadingPipeline(self.warm_up_stages()).start()
+        self.warm_up_steps = self.warm_up_main_thread_steps()
+
+    def warm_up_stages(self) -> List[LoadingStage]:
+        """Slow imports and tables, run on a thread behind the main menu"""
+        return [LoadingStage("biome_palette", lambda results, progress: biome_palette())]
+
+    def warm_up_main_thread_steps(self) -> List[Callable]:
+        """Assets that must load on the main thread, one per menu frame"""
+        return [
+            # Cached by name, like Entity loads them
+            partial(load_model, "player", application.asset_folder),
+            partial(load_model, "enemy", application.asset_folder),
+            get_atlas_texture,
+            partial(load_texture, path.join("assets", "cursor.png")),
+        ]
+
+    def warm_up(self):
+        self.menu_frames += 1
+        if self.menu_frames > 1 and self.warm_up_steps:
+            # Not in the first frame, that one shows the menu
+            self.warm_up_steps.pop(0)()
 
     def start_game(self, **kwargs):
         self.game_state = GameState.STARTING
@@ -570,7 +828,7 @@ class UrsinaMC(MainMenuUrsina):
         )
 
     def load_game_sequentially(self):
-        if self.loading_step == 0:
+        if self.loading_pipeline is None:
             self.game_background = Sky()
             self.loading_bar = HealthBar(
                 max_value=100,
@@ -580,38 +838,96 @@ class UrsinaMC(MainMenuUrsina):
                 animation_duration=0,
                 bar_color=gray,
             )
-        elif self.loading_step == 10:
-            # Generate map 1/3
-            height_map = generate_noise_map(self.world_shape, self.seed, **NOISE_HEIGHT_ISLAND)
-            circular_map = create_circular_map_mask(self.world_size)
-            self._height_map_island = combine_maps(height_map, circular_map)
-        elif self.loading_step == 20:
-            # Generate map 2/3
-            self._heat_map = generate_noise_map(self.world_shape, self.seed, **NOISE_HEAT)
-        elif self.loading_step == 30:
-            # Generate map 3/3
-            self.world_map2d = convert_to_blocks_map(self._height_map_island, self._heat_map)
-        elif self.loading_step == 40:
-            self.world = World(self.world_map2d, self.world_size, self.render_size)
-        elif self.loading_step == 50:
-            self.minimap = MiniMap(self.world_map2d, self.seed, self.world_size)
-            self.minimap.update_positions(self.world.position_start)
-            self.minimap.map.visible = False
-            self.minimap.player_icon.visible = False
-        elif self.loading_step == 80:
-            self.world.init_player(speed=self.speed, allow_fly=True)
-            self.world.init_enemies(total_enemies=self.enemies_total)
-        elif self.loading_step == 90:
-            destroy(self.loading_bar)
-            self.loading_bar = None
+            self.loading_pipeline = LoadingPipeline(self.loading_stages()).start()
+            self.loading_steps = self.loading_main_thread_steps()
+            self.loading_steps_total = len(self.loading_steps)
+            return
+        self.loading_pipeline.raise_error()
+        if self.loading_steps and self.loading_pipeline.is_done(self.loading_steps[0][0]):
+            # Create entities on the main thread, one step per frame
+            _, step = self.loading_steps.pop(0)
+            step()
+        steps_done = self.loading_steps_total - len(self.loading_steps)
+        progress = (
+            self.loading_pipeline.progress * 0.8 + steps_done / self.loading_steps_total * 0.2
+        )
+        self.loading_bar.value = max(1, int(progress * 100))
+        if not self.loading_steps:
+            # Hidden only, the bar still enables its lines 0.1s after the last value change
+            self.loading_bar.enabled = False
             self.minimap.map.visible = True
             self.minimap.player_icon.visible = True
             super().start_game()
             self.game_state = GameState.PLAYING
             logger.info("Game playing")
-            return
-        self.loading_bar.value = self.loading_step
-        self.loading_step += 2
+
+    def loading_stages(self) -> List[LoadingStage]:
+        """CPU-bound loading stages, run on the loading thread"""
+        return [
+            LoadingStage("world_map", self.generate_world_map, weight=6),
+            LoadingStage("minimap", self.load_minimap_image, weight=3),
+            LoadingStage("world_cache", self.save_world_cache, weight=1),
+        ]
+
+    def loading_main_thread_steps(self) -> List[Tuple[str, Callable]]:
+        """Entity creation steps with the loading stage they wait for"""
+        return [
+            ("world_map", self.create_world),
+            ("minimap", self.create_minimap),
+            ("world_map", self.create_player_and_enemies),
+        ]
+
+    def generate_world_map(self, results, progress) -> AnyWorldMap:
+        self.world_map_generated = False
+        if use_chunked_world(self.world_size):
+            # Generate map lazily in chunks, only the overview now
+            return ChunkedWorldMap(self.seed, self.world_size)
+        world_map2d = load_world_map(self.seed, self.world_size)
+        if world_map2d is not None:
+            return world_map2d
+
+        # One map after the other, all workers of one pool on each map
+        with worker_pool(total_workers(self.world_size)) as pool:
+            height_map = generate_noise_map(
+                self.world_shape,
+                self.seed,
+                progress=lambda fraction: progress(fraction * 0.45),
+                pool=pool,
+                **NOISE_HEIGHT_ISLAND,
+            )
+            heat_map = generate_noise_map(
+                self.world_shape,
+                self.seed,
+                progress=lambda fraction: progress(0.45 + fraction * 0.45),
+                pool=pool,
+                **NOISE_HEAT,
+            )
+            circular_map = create_circular_map_mask(self.world_size)
+            height_map_island = combine_maps(height_map, circular_map)
+            self.world_map_generated = True
+            return convert_to_blocks_map(height_map_island, heat_map, pool=pool)
+
+    def load_minimap_image(self, results, progress):
+        MiniMap.save_minimap(results["world_map"], self.seed)
+
+    def save_world_cache(self, results, progress):
+        if self.world_map_generated:
+            save_world_map(self.seed, self.world_size, results["world_map"])
+
+    def create_world(self):
+        self.world_map2d = self.loading_pipeline.result("world_map")
+        edits = EditLog.load(edit_log_path(self.seed, self.world_size))
+        self.world = World(self.world_map2d, self.world_size, self.render_size, edits)
+
+    def create_minimap(self):
+        self.minimap = MiniMap(self.seed, self.world_size)
+        self.minimap.update_positions(self.world.position_start)
+        self.minimap.map.visible = False
+        self.minimap.player_icon.visible = False
+
+    def create_player_and_enemies(self):
+        self.world.init_player(speed=self.speed, allow_fly=True)
+        self.world.init_enemies(total_enemies=self.enemies_total, seed=self.seed)
 
     def quit_game(self):
         if self.game_state == GameState.MAIN_MENU:
@@ -624,19 +940,32 @@ class UrsinaMC(MainMenuUrsina):
 
     def reset_game(self):
         self.world_map2d = None
-        self.world.delete()
-        self.world = None
-        self.minimap.delete()
-        self.minimap = None
+        if self.loading_pipeline:
+            self.loading_pipeline.cancel()
+            self.loading_pipeline = None
+        if self.loading_bar:
+            destroy(self.loading_bar)
+            self.loading_bar = None
+        if self.world:
+            self.world.delete()
+            self.world = None
+        if self.minimap:
+            self.minimap.delete()
+            self.minimap = None
         destroy(self.game_background)
         self.game_background = None
-        self.loading_step = 0
 
     def input(self, key):
         if key == "escape":
             self.quit_game()
+        if key == "f3":
+            self.toggle_instrument_overlay()
+        if key == "f4":
+            instrument.dump(conf.INSTRUMENT_DUMP_FILE)
         super().input(key)
         if key == "tab":
+            if self.spectate_camera is None:
+                self.spectate_camera = EditorCamera(enabled=False, ignore_paused=True)
             toggle_spectate = not self.spectate_camera.enabled
             application.paused = toggle_spectate
             mouse.locked = not toggle_spectate
@@ -646,8 +975,21 @@ class UrsinaMC(MainMenuUrsina):
             self.spectate_camera.position = position
             self.spectate_camera.enabled = toggle_spectate
 
+    def toggle_instrument_overlay(self):
+        if self.instrument_overlay is None:
+            instrument.enable()
+            self.instrument_overlay = InstrumentOverlay()
+        else:
+            instrument.enable(conf.INSTRUMENT)
+            destroy(self.instrument_overlay)
+            self.instrument_overlay = None
+
+    @timeit
     def _update(self, task):
-        if self.game_state == GameState.STARTING:
+        instrument.observe("UrsinaMC.frame_dt", utime.dt * 1000)
+        if self.game_state == GameState.MAIN_MENU:
+            self.warm_up()
+        elif self.game_state == GameState.STARTING:
             self.load_game_sequentially()
         elif self.game_state == GameState.PLAYING:
             self.world.update_enemies()
@@ -0,0 +1,46 @@
+from typing import Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Pool(Generic[T]):
+    """Released objects kept for reuse instead of being destroyed
+
+    At most `max_size` objects are kept, the high-water mark. Objects released to a full pool
+    are passed to `discard`.
+    """
+
+    max_size: int
+    free: List[T]
+    discard: Callable[[T], None]
+    created: int  # Acquires that found the pool empty
+    reused: int
+
+    def __init__(self, max_size: int, discard: Callable[[T], None]):
+        self.max_size = max_size
+        self.free = list()
+        self.discard = discard
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self) -> int:
+        return len(self.free)
+
+    def acquire(self) -> Optional[T]:
+        """A released object, None when the caller has to create a new one"""
+        if not self.free:
+            self.created += 1
+            return None
+        self.reused += 1
+        return self.free.pop()
+
+    def release(self, item: T) -> None:
+        if len(self.free) < self.max_size:
+            self.free.append(item)
+        else:
+            self.discard(item)
+
+    def clear(self) -> None:
+        for item in self.free:
+            self.discard(item)
+        self.free = list()
@@ -0,0 +1,191 @@
+"""Replay a player walk to profile the cost of every frame
+
+Loads a seed and walks the player along a recorded or generated path with a fixed dt, without
+input. Every frame records the time of `UrsinaMC._update` and of the whole frame, the blocks
+and chunks added and removed, the enabled enemies and the entity count. The trace and
+p50/p95/p99 summaries are written as JSON.
+
+    python replay.py --offscreen --seed 34315 --frames 600
+    python replay.py --record path.json        # Play and record a path, quit with escape
+    python replay.py --offscreen --path path.json
+"""
+
+import argparse
+import json
+import math
+import sys
+from os import makedirs, path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+import conf
+import instrument
+
+TRACE_PATH = path.join("benchmarks", "replay.json")
+PERCENTILES = (50, 95, 99)
+
+Path = List[Tuple[float, float]]
+
+
+class FrameStats(NamedTuple):
+    frame: int
+    x: float
+    z: float
+    update_ms: float  # UrsinaMC._update
+    frame_ms: float  # Whole frame, with rendering
+    blocks_added: int
+    blocks_removed: int
+    chunks_added: int
+    chunks_removed: int
+    enemies_enabled: int
+    entities: int
+
+
+def line_path(
+    start: Tuple[float, float], frames: int, speed: float, dt: float, world_size: int
+) -> Path:
+    """Walk from `start` through the world center, turning back at the world border"""
+    direction = np.array([world_size / 2, world_size / 2]) - start
+    length = np.linalg.norm(direction)
+    direction = direction / length if length > 0 else np.array([1.0, 0.0])
+    distance = np.arange(frames) * speed * dt
+    # Triangle wave keeps the walk inside 1 <= x, z < world_size - 1
+    low, high = 1.0, world_size - 1.0
+    points = np.array(start) + distance[:, None] * direction
+    points = high - np.abs((points - low) % (2 * (high - low)) - (high - low))
+    return [(float(x), float(z)) for x, z in points]
+
+
+def circle_path(start: Tuple[float, float], frames: int, speed: float, dt: float) -> Path:
+    """Walk circles around `start`, one circle of 10 seconds"""
+    radius = speed * 10 / (2 * math.pi)
+    angles = np.arange(frames) * speed * dt / radius
+    x = start[0] + radius * (np.cos(angles) - 1)
+    z = start[1] + radius * np.sin(angles)
+    return [(float(x_), float(z_)) for x_, z_ in zip(x, z)]
+
+
+def load_path(file_path: str) -> Path:
+    with open(file_path) as file:
+        return [(float(x), float(z)) for x, z in json.load(file)]
+
+
+def save_json(file_path: str, data) -> None:
+    makedirs(path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w") as file:
+        json.dump(data, file, indent=1)
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not len(values):
+        return dict()
+    result = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    result["max"] = float(np.max(values))
+    result["mean"] = float(np.mean(values))
+    return result
+
+
+def summary(frames: Sequence[FrameStats]) -> Dict[str, Dict[str, float]]:
+    return {
+        "update_ms": percentiles([frame.update_ms for frame in frames]),
+        "frame_ms": percentiles([frame.frame_ms for frame in frames]),
+    }
+
+
+def use_offscreen_window(width: int = 1280, height: int = 720) -> None:
+    """Render to an offscreen buffer, call before ursina is imported"""
+    from direct.showbase.ShowBase import ShowBase
+    from panda3d.core import ButtonThrower, MouseWatcher, NodePath, loadPrcFileData
+
+    loadPrcFileData("", "window-type offscreen")
+    loadPrcFileData("", f"win-size {width} {height}")
+    loadPrcFileData("", "audio-library-name null")
+
+    import screeninfo
+
+    try:
+        screeninfo.get_monitors()
+    except screeninfo.ScreenInfoError:
+        # Ursina sizes its window by the first monitor, there is none without a display
+        monitor = screeninfo.Monitor(x=0, y=0, width=width, height=height)
+        screeninfo.get_monitors = lambda *args, **kwargs: [monitor]
+
+    show_base_init = ShowBase.__init__
+
+    def init_with_input(self, *args, **kwargs):
+        # Ursina listens to the button thrower, an offscreen buffer gets no input nodes
+        show_base_init(self, *args, **kwargs)
+        if self.buttonThrowers is None:
+            self.buttonThrowers = [NodePath(ButtonThrower("replay"))]
+            self.mouseWatcherNode = MouseWatcher()
+            self.mouseWatcher = NodePath(self.mouseWatcherNode)
+
+    ShowBase.__init__ = init_with_input  # type: ignore
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=conf.ISLAND_SEED_CLASSIC)
+    parser.add_argument("--world-size", type=int, default=conf.WORLD_SIZE)
+    parser.add_argument("--render-size", type=int, default=conf.BLOCKS_RENDER_DISTANCE)
+    parser.add_argument("--enemies", type=int, default=conf.ENEMIES_TOTAL)
+    parser.add_argument("--speed", type=float, default=conf.PLAYER_SPEED)
+    parser.add_argument("--frames", type=int, default=600, help="Frames of a generated path")
+    parser.add_argument("--fps", type=int, default=60, help="Fixed dt is 1 / fps")
+    parser.add_argument("--pattern", choices=["line", "circle"], default="line")
+    parser.add_argument("--path", help="JSON path of [x, z] per frame instead of a pattern")
+    parser.add_argument("--record", help="Play with a window and save the walked path here")
+    parser.add_argument("--offscreen", action="store_true", help="No window, needs no display")
+    parser.add_argument("--instrument", action="store_true", help="Add timers and counters")
+    parser.add_argument("--output", default=TRACE_PATH)
+    options = parser.parse_args(args)
+
+    if options.offscreen:
+        use_offscreen_window()
+    if options.instrument:
+        instrument.enable()
+    from replay_game import RecorderMC, ReplayMC
+
+    settings = dict(
+        seed=options.seed,
+        world_size=options.world_size,
+        render_size=options.render_size,
+        enemies_total=options.enemies,
+        player_speed=options.speed,
+    )
+    if options.record:
+        RecorderMC(options.record, settings).run()
+        return 0
+
+    app = ReplayMC(settings, dt=1 / options.fps)
+    world = app.load()
+    start = (world.player.x, world.player.z)
+    if options.path:
+        walk = load_path(options.path)
+    elif options.pattern == "circle":
+        walk = circle_path(start, options.frames, options.speed, 1 / options.fps)
+    else:
+        walk = line_path(start, options.frames, options.speed, 1 / options.fps, options.world_size)
+    instrument.reset()  # Only the replay, not the loading
+    frames = app.replay(walk)
+
+    result = summary(frames)
+    save_json(
+        options.output,
+        {
+            "settings": {**settings, "fps": options.fps, "offscreen": options.offscreen},
+            "loading_frames": app.loading_frames,
+            "summary": result,
+            "frames": [frame._asdict() for frame in frames],
+            "instrument": instrument.snapshot() if options.instrument else None,
+        },
+    )
+    for name, values in result.items():
+        print(name, ", ".join(f"{key} {value:.2f}" for key, value in values.items()))
+    print(f"Trace of {len(frames)} frames in {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
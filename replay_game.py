@@ -0,0 +1,107 @@
+"""Games driven by replay.py, a replay without input and a recorder of the walked path
+
+Kept apart from replay.py, which must be importable before ursina: its `--offscreen` setup
+has to run before ursina creates its window.
+"""
+
+import logging
+import time
+from typing import List, Sequence, Tuple
+
+from panda3d.core import ClockObject
+from ursina.scene import instance as scene
+from ursina.vec3 import Vec3
+
+import conf
+from play import GameState, UrsinaMC, World
+from replay import FrameStats, save_json
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+
+class ReplayMC(UrsinaMC):
+    """Game without input that walks the player along a path with a fixed dt and records the
+    cost of every frame"""
+
+    settings: dict
+    loading_frames: int = 0
+    update_ns: int = 0
+
+    def __init__(self, settings: dict, dt: float):
+        super().__init__()
+        self.settings = settings
+        clock = ClockObject.getGlobalClock()
+        clock.setMode(ClockObject.MNonRealTime)
+        clock.setFrameRate(1 / dt)
+
+    def load(self) -> World:
+        self.pre_start_game(**self.settings)
+        while self.game_state != GameState.PLAYING:
+            self.step()
+            self.loading_frames += 1
+        return self.loaded_world()
+
+    def loaded_world(self) -> World:
+        if self.world is None:
+            raise RuntimeError("Load the game before the replay")
+        return self.world
+
+    def replay(self, walk: Sequence[Tuple[float, float]]) -> List[FrameStats]:
+        frames = list()
+        world = self.loaded_world()
+        for frame, (x, z) in enumerate(walk):
+            world.player.position = Vec3(x, world.terrain.ground_height(x, z), z)
+            # Cells, not Block entities, a pooled block is the same entity at another cell
+            blocks = {block.get_map_position() for block in world.blocks}
+            chunks = set(world.chunks)
+            time_start = time.perf_counter_ns()
+            self.step()
+            frame_ns = time.perf_counter_ns() - time_start
+            blocks_now = {block.get_map_position() for block in world.blocks}
+            chunks_now = set(world.chunks)
+            stats = FrameStats(
+                frame=frame,
+                x=x,
+                z=z,
+                update_ms=self.update_ns / 1e6,
+                frame_ms=frame_ns / 1e6,
+                blocks_added=len(blocks_now - blocks),
+                blocks_removed=len(blocks - blocks_now),
+                chunks_added=len(chunks_now - chunks),
+                chunks_removed=len(chunks - chunks_now),
+                enemies_enabled=sum(enemy.enabled for enemy in world.enemies),
+                entities=len(scene.entities),
+            )
+            frames.append(stats)
+        return frames
+
+    def _update(self, task):
+        time_start = time.perf_counter_ns()
+        result = super()._update(task)
+        self.update_ns = time.perf_counter_ns() - time_start
+        return result
+
+
+class RecorderMC(UrsinaMC):
+    """Normal game that saves the walked (x, z) per frame as a path for replay.py"""
+
+    file_path: str
+    walk: List[Tuple[float, float]]
+
+    def __init__(self, file_path: str, settings: dict):
+        super().__init__()
+        self.file_path = file_path
+        self.walk = list()
+        self.pre_start_game(**settings)
+
+    def _update(self, task):
+        if self.game_state == GameState.PLAYING:
+            self.walk.append((float(self.world.player.x), float(self.world.player.z)))
+        return super()._update(task)
+
+    def quit_game(self):
+        if self.walk:
+            save_json(self.file_path, self.walk)
+            logger.info(f"Saved path of {len(self.walk)} frames to {self.file_path}")
+            self.walk = list()
+        super().quit_game()
@@ -0,0 +1,56 @@
+import math
+from typing import Dict, Hashable, Iterator, Set, Tuple
+
+Cell = Tuple[int, int]
+
+
+class SpatialHash:
+    """Uniform grid of items by their (x, z) position
+
+    Items are kept in a bucket per square cell, a range query only visits the buckets that
+    overlap the range. Moving an item within its cell costs nothing.
+    """
+
+    cell_size: int
+    buckets: Dict[Cell, Set[Hashable]]
+    item_cells: Dict[Hashable, Cell]
+
+    def __init__(self, cell_size: int):
+        self.cell_size = cell_size
+        self.buckets = dict()
+        self.item_cells = dict()
+
+    def __len__(self) -> int:
+        return len(self.item_cells)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.item_cells
+
+    def cell(self, x: float, z: float) -> Cell:
+        return math.floor(x) // self.cell_size, math.floor(z) // self.cell_size
+
+    def insert(self, item: Hashable, x: float, z: float) -> None:
+        cell = self.cell(x, z)
+        self.item_cells[item] = cell
+        self.buckets.setdefault(cell, set()).add(item)
+
+    def remove(self, item: Hashable) -> None:
+        cell = self.item_cells.pop(item)
+        bucket = self.buckets[cell]
+        bucket.discard(item)
+        if not bucket:
+            del self.buckets[cell]
+
+    def move(self, item: Hashable, x: float, z: float) -> None:
+        if self.item_cells.get(item) == self.cell(x, z):
+            return
+        if item in self.item_cells:
+            self.remove(item)
+        self.insert(item, x, z)
+
+    def query_box(self, x_min: float, x_max: float, z_min: float, z_max: float) -> Iterator:
+        """Items in the cells overlapping the box, the caller filters the exact range"""
+        cell_min, cell_max = self.cell(x_min, z_min), self.cell(x_max, z_max)
+        for cell_x in range(cell_min[0], cell_max[0] + 1):
+            for cell_z in range(cell_min[1], cell_max[1] + 1):
+                yield from self.buckets.get((cell_x, cell_z), ())
@@ -0,0 +1,74 @@
+"""Enemy spawn points
+
+The land cells of the world are collected once, spawn points are drawn from them without
+replacement in one vectorized choice. The same seed and player position give the same spawn
+points. Chunked worlds only know their land at overview resolution without generating all
+chunks, so their spawn points are the land cells of the overview.
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+
+import conf
+from block import BIOME_CODES, WATER_BIOMES
+from chunked_world import AnyWorldMap, ChunkedWorldMap
+from spatial_hash import SpatialHash
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+WATER_CODES = [BIOME_CODES[biome] for biome in WATER_BIOMES]
+SPACING_CANDIDATES = 8  # Candidates drawn per spawn point when a minimum spacing is asked
+
+
+def land_cells(world_map2d: AnyWorldMap) -> Tuple[np.ndarray, np.ndarray]:
+    """(N, 2) x, z and world heights of the land cells, not on the first row and column like
+    `World.random_island_position`"""
+    if isinstance(world_map2d, ChunkedWorldMap):
+        overview, stride = world_map2d.overview, world_map2d.stride
+    else:
+        overview, stride = world_map2d, 1
+    land = ~np.isin(overview.biome, WATER_CODES)
+    land[0, :] = land[:, 0] = False  # Overview cell 0 is world cell 0
+    cells = np.argwhere(land)
+    return cells * stride, overview.world_height[land]
+
+
+def plan_spawns(
+    cells: np.ndarray,
+    total: int,
+    seed: int,
+    center: Tuple[int, int],
+    radius: int,
+    min_spacing: float = 0,
+) -> np.ndarray:
+    """Indexes of up to `total` spawn cells drawn from `cells` outside the disk of `radius`
+    around `center`, at least `min_spacing` apart, fewer when there is not enough room"""
+    rng = np.random.default_rng(seed)
+    draws = total if min_spacing <= 0 else total * SPACING_CANDIDATES
+    # Draw extra for the cells in the disk instead of masking all cells
+    extra = (2 * radius + 1) ** 2
+    picked = rng.choice(len(cells), size=min(draws + extra, len(cells)), replace=False)
+    picked = picked[((cells[picked] - center) ** 2).sum(axis=1) > radius**2][:draws]
+    if min_spacing > 0:
+        picked = _spaced(cells, picked, total, min_spacing)
+    if len(picked) < total:
+        logger.warning(f"Room for {len(picked)} of {total} spawn points")
+    return picked
+
+
+def _spaced(cells: np.ndarray, picked: np.ndarray, total: int, min_spacing: float) -> np.ndarray:
+    """First `total` picked cells that are at least `min_spacing` from the earlier kept ones"""
+    spatial_hash = SpatialHash(max(1, int(np.ceil(min_spacing))))
+    kept = list()
+    for index, (x, z) in zip(picked.tolist(), cells[picked].tolist()):
+        near = spatial_hash.query_box(
+            x - min_spacing, x + min_spacing, z - min_spacing, z + min_spacing
+        )
+        if all((x - nx) ** 2 + (z - nz) ** 2 >= min_spacing**2 for nx, nz in near):
+            spatial_hash.insert((x, z), x, z)
+            kept.append(index)
+            if len(kept) == total:
+                break
+    return np.array(kept, dtype=int)
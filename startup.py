@@ -0,0 +1,110 @@
+"""Startup time of the game up to the main menu
+
+Starts the game in a fresh interpreter under `python -X importtime` and reports the time to
+import `play` and to show the first main menu frame, with the modules that took the longest
+to import `play`. Only what the main menu needs is imported up front, the game warms up the
+rest while the menu is shown, see `UrsinaMC.warm_up_stages`.
+
+    python startup.py --offscreen
+    python startup.py --offscreen --top 30 --output benchmarks/startup.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from os import path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from replay import save_json
+
+STARTUP_PATH = path.join("benchmarks", "startup.json")
+RESULT_PREFIX = "startup:"
+IMPORTED_MARKER = "startup: play imported"
+
+# Runs in the measured interpreter, prints the result line after the first menu frame
+MENU_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+if {offscreen}:
+    from replay import use_offscreen_window
+    use_offscreen_window()
+import play
+imported = time.perf_counter()
+print("{marker}", file=sys.stderr, flush=True)  # Later imports are the warm up
+app = play.UrsinaMC()
+app.step()
+shown = time.perf_counter()
+print("{prefix}" + json.dumps(dict(import_s=imported - started, menu_s=shown - started)))
+"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int  # Including the modules it imported first
+    depth: int  # 0 for modules imported by the script itself
+
+
+def parse_importtime(lines: Sequence[str], stop: Optional[str] = None) -> List[ImportTime]:
+    """Entries of the `-X importtime` lines up to line `stop`, other lines are skipped"""
+    times = list()
+    for line in lines:
+        if line == stop:
+            break
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        module = name.rstrip()
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        times.append(ImportTime(module.strip(), int(self_us), int(cumulative_us), depth))
+    return times
+
+
+def slowest_imports(times: Sequence[ImportTime], top: int) -> List[ImportTime]:
+    return sorted(times, key=lambda time: time.cumulative_us, reverse=True)[:top]
+
+
+def measure_startup(offscreen: bool) -> Dict:
+    script = MENU_SCRIPT.format(offscreen=offscreen, prefix=RESULT_PREFIX, marker=IMPORTED_MARKER)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True
+    )
+    results = [line for line in process.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if not results:
+        raise RuntimeError(f"Game did not start:\n{process.stderr[-2000:]}")
+    return dict(
+        **json.loads(results[-1][len(RESULT_PREFIX) :]),
+        imports=parse_importtime(process.stderr.splitlines(), stop=IMPORTED_MARKER),
+    )
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offscreen", action="store_true", help="No window, needs no display")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to show")
+    parser.add_argument("--output", default=STARTUP_PATH)
+    options = parser.parse_args(args)
+
+    result = measure_startup(options.offscreen)
+    slowest = slowest_imports(result["imports"], options.top)
+    save_json(
+        options.output,
+        {
+            "offscreen": options.offscreen,
+            "import_s": result["import_s"],
+            "menu_s": result["menu_s"],
+            "slowest_imports": [time._asdict() for time in slowest],
+        },
+    )
+    print(f"import play {result['import_s']:.2f}s, main menu {result['menu_s']:.2f}s")
+    for time in slowest:
+        print(f"{time.cumulative_us / 1000:8.1f} ms  {'  ' * time.depth}{time.module}")
+    print(f"Report in {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Terrain collision queries from the world map instead of Panda3D raycasts
+
+Block (x, y, z) is the unit cube centered on (x + 0.5, y, z + 0.5). The terrain of a column is
+solid up to the top of its world height block, water columns have no solid block. Player placed
+blocks are tracked per column.
+
+The queries take numpy arrays of points, the scalar variants are for single entities.
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from block import BIOME_CODES, WATER_BIOMES
+from chunked_world import AnyWorldMap
+
+FLOOR_Y = -1.9  # Hidden floor below the world, catches everything falling through water
+WATER_CODES = [BIOME_CODES[biome] for biome in WATER_BIOMES]
+
+
+class TerrainQuery:
+    world_map2d: AnyWorldMap
+    world_size: int
+    placed: Dict[Tuple[int, int], List[int]]  # Levels of placed blocks per (x, z) column
+    version: int  # Changes every time placed blocks change
+
+    def __init__(self, world_map2d: AnyWorldMap, world_size: int):
+        self.world_map2d = world_map2d
+        self.world_size = world_size
+        self.placed = dict()
+        self.version = 0
+
+    def add_block(self, x: int, y: int, z: int) -> None:
+        self.placed.setdefault((x, z), []).append(y)
+        self.version += 1
+
+    def remove_block(self, x: int, y: int, z: int) -> None:
+        levels = self.placed.get((x, z), [])
+        if y in levels:
+            levels.remove(y)
+            self.version += 1
+            if not levels:
+                del self.placed[(x, z)]
+
+    def _inside(self, x_cells: np.ndarray, z_cells: np.ndarray) -> np.ndarray:
+        return (
+            (0 <= x_cells)
+            & (x_cells < self.world_size)
+            & (0 <= z_cells)
+            & (z_cells < self.world_size)
+        )
+
+    def terrain_tops(self, x_cells: np.ndarray, z_cells: np.ndarray) -> np.ndarray:
+        """Top of the solid terrain of the columns (x_cells[i], z_cells[i])"""
+        tops = np.full(len(x_cells), FLOOR_Y)
+        inside = self._inside(x_cells, z_cells)
+        biome, world_height = self.world_map2d.take(x_cells[inside], z_cells[inside])
+        tops[inside] = np.where(np.isin(biome, WATER_CODES), FLOOR_Y, world_height + 0.5)
+        return tops
+
+    def surface_tops(self, x_cells: np.ndarray, z_cells: np.ndarray) -> np.ndarray:
+        """Like `terrain_tops`, with water columns at their surface instead of the floor"""
+        tops = np.full(len(x_cells), FLOOR_Y)
+        inside = self._inside(x_cells, z_cells)
+        _, world_height = self.world_map2d.take(x_cells[inside], z_cells[inside])
+        tops[inside] = world_height + 0.5
+        return tops
+
+    def are_water(self, x_cells: np.ndarray, z_cells: np.ndarray) -> np.ndarray:
+        """Whether the columns (x_cells[i], z_cells[i]) are water, never outside the world"""
+        water = np.zeros(len(x_cells), dtype=bool)
+        inside = self._inside(x_cells, z_cells)
+        biome, _ = self.world_map2d.take(x_cells[inside], z_cells[inside])
+        water[inside] = np.isin(biome, WATER_CODES)
+        return water
+
+    def has_placed(self, x_cells: np.ndarray, z_cells: np.ndarray) -> np.ndarray:
+        """Whether the columns (x_cells[i], z_cells[i]) have player placed blocks"""
+        placed = np.zeros(len(x_cells), dtype=bool)
+        placed[self._indexes_with_placed(x_cells, z_cells)] = True
+        return placed
+
+    def ground_heights(self, x: np.ndarray, z: np.ndarray, below: np.ndarray) -> np.ndarray:
+        """Highest solid surface of the columns at (x[i], z[i]) that is not above `below[i]`"""
+        x_cells, z_cells = np.floor(x).astype(int), np.floor(z).astype(int)
+        ground = self.terrain_tops(x_cells, z_cells)
+        ground[ground > below] = FLOOR_Y
+        for index in self._indexes_with_placed(x_cells, z_cells):
+            for level in self.placed[(x_cells[index], z_cells[index])]:
+                if ground[index] < level + 0.5 <= below[index]:
+                    ground[index] = level + 0.5
+        return ground
+
+    def are_blocked(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Whether the points (x[i], y[i], z[i]) are inside the terrain or a placed block"""
+        x_cells, z_cells = np.floor(x).astype(int), np.floor(z).astype(int)
+        blocked = y < self.terrain_tops(x_cells, z_cells)
+        for index in self._indexes_with_placed(x_cells, z_cells):
+            levels = self.placed[(x_cells[index], z_cells[index])]
+            blocked[index] |= any(level - 0.5 <= y[index] < level + 0.5 for level in levels)
+        return blocked
+
+    def ground_height(self, x: float, z: float, below: float = math.inf) -> float:
+        return float(self.ground_heights(np.array([x]), np.array([z]), np.array([below]))[0])
+
+    def is_blocked(self, x: float, y: float, z: float) -> bool:
+        return bool(self.are_blocked(np.array([x]), np.array([y]), np.array([z]))[0])
+
+    def _indexes_with_placed(self, x_cells: np.ndarray, z_cells: np.ndarray) -> List[int]:
+        if not self.placed:
+            return []
+        columns = zip(x_cells.tolist(), z_cells.tolist())
+        return [index for index, column in enumerate(columns) if column in self.placed]
@@ -0,0 +1,22 @@
+import json
+
+from atlas import ATLAS_RECTS, ATLAS_TILE_PIXELS, ATLAS_TILES, load_atlas, save_atlas, uv_rects
+
+
+def test_uv_rects_side_by_side_within_tiles():
+    rects = list(uv_rects(["a.png", "b.png"]).values())
+
+    assert 0 < rects[0].u0 < rects[0].u1 < 0.5 < rects[1].u0 < rects[1].u1 < 1
+    assert all(0 < rect.v0 < rect.v1 < 1 for rect in rects)
+
+
+def test_saved_atlas_matches_assets(tmp_path):
+    image, rects = load_atlas()
+    assert image.size == (ATLAS_TILE_PIXELS * len(ATLAS_TILES), ATLAS_TILE_PIXELS)
+    assert rects == uv_rects()
+
+    for name in ATLAS_TILES:
+        (tmp_path / name).write_bytes(open(f"assets/{name}", "rb").read())
+    save_atlas(str(tmp_path))
+    assert json.loads((tmp_path / ATLAS_RECTS).read_text())["tile_pixels"] == ATLAS_TILE_PIXELS
+    assert load_atlas(str(tmp_path))[0].tobytes() == image.tobytes()
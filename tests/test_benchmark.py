@@ -0,0 +1,33 @@
+import json
+
+from benchmark import Regression, best_time, compare, main
+
+
+def test_compare_reports_slowdowns_above_tolerance_and_noise_floor():
+    baseline = {"a": 0.100, "b": 0.100, "c": 0.0001, "d": 0.100}
+    results = {"a": 0.120, "b": 0.200, "c": 0.0005, "e": 1.0}
+
+    assert compare(results, baseline, tolerance=0.25) == [Regression("b", 0.200, 0.100)]
+
+
+def test_main_writes_json_and_compares_with_baseline(tmp_path):
+    args = ["--sizes", "20", "--render-sizes", "2", "--repeat", "1"]
+    args += ["--output", str(tmp_path / "results.json")]
+    args += ["--baseline", str(tmp_path / "baseline.json")]
+
+    assert main(args + ["--save-baseline"]) == 0
+    assert main(args + ["--tolerance", "1000"]) == 0
+
+    with open(tmp_path / "results.json") as file:
+        results = json.load(file)["results"]
+    assert "convert_to_blocks_map[world_size=20]" in results
+    assert "points_changed_2dcircle[render_size=2]" in results
+
+
+def test_best_time_gives_every_run_fresh_setup():
+    runs = []
+
+    best_time(runs.append, repeat=3, setup=list)
+
+    assert len(runs) == 3 and all(run == [] for run in runs)
+    assert len({id(run) for run in runs}) == 3
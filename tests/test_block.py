@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from block import BIOME_CODES, BIOME_RULES, BiomeBlock, classify_blocks
+
+THRESHOLDS = [0, 0.1, 0.4, 0.5, 0.6, 0.65, 0.8, 0.95, 1]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_classify_blocks_equals_biome_block(seed):
+    rng = np.random.default_rng(seed)
+    height_map = rng.random((50, 50))
+    heat_map = rng.random((50, 50))
+    # Include exact threshold values
+    height_map[0, : len(THRESHOLDS)] = THRESHOLDS
+    heat_map[1, : len(THRESHOLDS)] = THRESHOLDS
+    height_map[2:5] = 0
+
+    biome, world_height = classify_blocks(height_map, heat_map)
+
+    for index in np.ndindex(height_map.shape):
+        block = BiomeBlock(height=height_map[index], heat=heat_map[index])
+        assert biome[index] == BIOME_CODES[block.biome]
+        assert world_height[index] == block.world_height
+
+
+def test_biome_rules_fallback():
+    assert BIOME_RULES[-1].height is None
+    assert BIOME_RULES[-1].heat is None
@@ -0,0 +1,126 @@
+import numpy as np
+
+from block import BIOME_CODES, Biomes
+from chunk_mesh import (
+    FACE_CORNERS,
+    FACE_NORMALS,
+    TILE_RECTS,
+    TOP,
+    block_mesh,
+    build_chunk_meshes,
+    chunk_faces,
+    column_depths,
+    padded_region,
+)
+from chunked_world import ChunkedWorldMap
+from world_map import WorldMap
+
+
+def flat_map(size, height=3, biome=Biomes.PLANE):
+    world_map = WorldMap.empty((size, size))
+    world_map.biome[:] = BIOME_CODES[biome]
+    world_map.world_height[:] = height
+    return world_map
+
+
+def test_faces_wound_towards_normal():
+    for corners, normal in zip(FACE_CORNERS, FACE_NORMALS):
+        # Ursina is left-handed, front faces are clockwise in right-handed math
+        cross = np.cross(corners[1] - corners[0], corners[2] - corners[0])
+        assert np.array_equal(cross, -normal)
+
+
+def test_flat_map_culls_hidden_faces():
+    world_map = flat_map(4)
+
+    land, water = chunk_faces(padded_region(world_map, 0, 0, 4), 0, 0)
+
+    assert np.sum(land.side == TOP) == 16
+    assert np.sum(land.side != TOP) == 16  # Only the world border sides
+    assert len(water.x) == 0
+
+
+def test_step_shows_side_faces_down_to_lowest_neighbour():
+    world_map = flat_map(3, height=2)
+    world_map.world_height[1, 1] = 5
+
+    land, _ = chunk_faces(padded_region(world_map, 1, 1, 1), 1, 1)
+
+    sides = land.side != TOP
+    assert np.sum(land.side == TOP) == 1
+    assert sorted(set(land.y[sides].tolist())) == [3, 4, 5]
+    assert np.sum(sides) == 4 * 3
+
+
+def test_water_hides_land_faces_below_surface():
+    world_map = flat_map(3, height=2)
+    world_map.biome[1, 2] = BIOME_CODES[Biomes.LAKE]
+    world_map.world_height[1, 2] = 1
+
+    land, water = chunk_faces(padded_region(world_map, 1, 1, 1), 1, 1)
+
+    towards_lake = land.side == 3  # NORTH, +z
+    assert land.y[towards_lake].tolist() == [1, 2]
+    assert len(water.x) == 0  # The lake is in the next chunk
+
+
+def fill_below_depth(world_map, x, z):
+    """Blocks of the former recursive World.fill_block_below"""
+    size = world_map.shape[0]
+    y = world_map.world_height[x, z]
+    neighbours = [(x + 1, z), (x - 1, z), (x, z + 1), (x, z - 1)]
+    heights = [world_map.world_height[n] for n in neighbours if 0 <= min(n) and max(n) < size]
+    depth = 1
+    while any(y - height > 1 for height in heights):
+        y, depth = y - 1, depth + 1
+    return depth
+
+
+def test_column_depths_match_recursive_fill():
+    rng = np.random.default_rng(1)
+    world_map = WorldMap(rng.integers(0, 8, (20, 20)), rng.integers(0, 12, (20, 20)))
+    water = np.isin(world_map.biome, [BIOME_CODES[Biomes.SEA], BIOME_CODES[Biomes.LAKE]])
+
+    depths = np.vstack(
+        [
+            np.hstack([column_depths(padded_region(world_map, x, z, 8)) for z in (0, 8, 16)])
+            for x in (0, 8, 16)
+        ]
+    )
+
+    expected = [[fill_below_depth(world_map, x, z) for z in range(20)] for x in range(20)]
+    assert water.any()
+    assert np.array_equal(depths, np.where(water, 1, expected))
+
+
+def test_chunks_are_seamless():
+    world_map = ChunkedWorldMap(34315, 48, chunk_size=16)
+    whole, _ = build_chunk_meshes(world_map, 16, 16, 16)
+
+    parts = [build_chunk_meshes(world_map, x, z, 8)[0] for x in (16, 24) for z in (16, 24)]
+
+    def face_set(vertices):
+        return {tuple(face.ravel()) for face in vertices.reshape(-1, 4, 3)}
+
+    assert face_set(whole.vertices) == set().union(*(face_set(part.vertices) for part in parts))
+
+
+def test_region_of_chunked_world_equals_cells():
+    world_map = ChunkedWorldMap(34315, 40, chunk_size=16)
+
+    region = world_map.region(10, 35, 5, 20)
+
+    for x, z in np.ndindex(region.shape):
+        assert region[x][z] == world_map[x + 10][z + 5]
+
+
+def test_block_mesh_is_unit_cube_with_tile_uvs_and_tint():
+    mesh = block_mesh(3, 0.97)
+
+    assert len(mesh) == 6
+    assert mesh.vertices.min(axis=0).tolist() == [-0.5, -0.5, -0.5]
+    assert mesh.vertices.max(axis=0).tolist() == [0.5, 0.5, 0.5]
+    u0, v0, u1, v1 = TILE_RECTS[3]
+    assert (mesh.uvs[:, 0] >= u0).all() and (mesh.uvs[:, 0] <= u1).all()
+    assert (mesh.uvs[:, 1] >= v0).all() and (mesh.uvs[:, 1] <= v1).all()
+    assert np.allclose(mesh.colors[:, :3], 0.97)
@@ -0,0 +1,49 @@
+import numpy as np
+
+from chunked_world import ChunkedWorldMap
+from generate_world import (
+    NOISE_HEAT,
+    NOISE_HEIGHT_ISLAND,
+    combine_maps,
+    convert_to_blocks_map,
+    create_circular_map_mask,
+    generate_noise_map,
+)
+
+
+def test_chunked_world_equals_full_world():
+    seed, size = 34315, 60
+    height_map = generate_noise_map((size, size), seed, **NOISE_HEIGHT_ISLAND)
+    height_map = combine_maps(height_map, create_circular_map_mask(size))
+    heat_map = generate_noise_map((size, size), seed, **NOISE_HEAT)
+    world_map = convert_to_blocks_map(height_map, heat_map)
+
+    chunked_map = ChunkedWorldMap(seed, size, chunk_size=16)
+
+    for x, z in np.ndindex(world_map.shape):
+        assert chunked_map[x][z] == world_map[x][z]
+
+
+def test_circular_map_mask_window():
+    mask = create_circular_map_mask(50)
+
+    window = create_circular_map_mask(50, rows=np.arange(10, 20), cols=np.arange(30, 50))
+
+    assert np.array_equal(window, mask[10:20, 30:50])
+
+
+def test_chunked_world_lazy_and_bounded():
+    chunk_bytes = 8 * 8 * 3
+    chunked_map = ChunkedWorldMap(10000, 80, chunk_size=8, cache_bytes=chunk_bytes * 2)
+    assert chunked_map.chunks_generated == 0
+
+    chunked_map[0][0]
+    chunked_map[7][7]
+    assert chunked_map.chunks_generated == 1
+    chunked_map[8][0]
+    chunked_map[0][8]
+    chunked_map[79][79]
+
+    assert chunked_map.chunks_generated == 4
+    assert list(chunked_map.chunks) == [(0, 1), (9, 9)]
+    assert chunked_map.nbytes <= chunk_bytes * 2
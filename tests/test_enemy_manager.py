@@ -0,0 +1,101 @@
+import numpy as np
+
+from block import BIOME_CODES, Biomes
+from enemy_manager import EnemyManager
+from terrain import TerrainQuery
+from utils import points_in_2dcircle
+from world_map import WorldMap
+
+
+def flat_manager(size=20, height=2):
+    world_map = WorldMap.empty((size, size))
+    world_map.biome[:] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[:] = height
+    return EnemyManager(TerrainQuery(world_map, size)), world_map
+
+
+def test_enemies_walk_to_player_on_the_ground():
+    manager, _ = flat_manager()
+    manager.add([(2.5, 2.5, 2.5), (15.5, 2.5, 2.5)])
+    manager.active[:] = True
+
+    for _ in range(30):
+        manager.step(1 / 30, (8.5, 2.5, 2.5))
+
+    assert manager.positions[0, 0] > 2.5 + 3
+    assert manager.positions[1, 0] < 15.5 - 3
+    assert np.allclose(manager.positions[:, 1], 2.5)
+    assert manager.grounded.all()
+
+
+def test_inactive_and_dead_enemies_are_frozen():
+    manager, _ = flat_manager()
+    manager.add([(2.5, 2.5, 2.5), (4.5, 2.5, 2.5), (6.5, 2.5, 2.5)])
+    manager.active[:] = [True, False, True]
+    manager.alive[2] = False
+
+    step = manager.step(0.1, (18.5, 2.5, 2.5))
+
+    assert step.updated.tolist() == [0]
+    assert manager.positions[1:, 0].tolist() == [4.5, 6.5]
+
+
+def test_enemy_falls_to_the_ground():
+    manager, _ = flat_manager()
+    manager.add([(2.5, 8.0, 2.5)])
+    manager.active[:] = True
+
+    for _ in range(200):
+        manager.step(1 / 30, (2.5, 2.5, 12.5))
+
+    assert manager.grounded[0]
+    assert 2.5 <= manager.positions[0, 1] <= 2.6
+
+
+def test_enemy_jumps_on_step_and_attacks_when_near():
+    manager, world_map = flat_manager()
+    world_map.world_height[5:, :] = 3
+    manager.add([(4.2, 2.5, 2.5)])
+    manager.active[:] = True
+    manager.attack_cooldown[:] = 0
+
+    attack_frames = []
+    for frame in range(90):
+        if len(manager.step(1 / 30, (7.5, 3.5, 2.5)).attacks):
+            attack_frames.append(frame)
+
+    assert manager.positions[0, 1] >= 3.5
+    assert len(attack_frames) == 2
+    assert attack_frames[1] - attack_frames[0] >= 1.5 * 30  # Attack cooldown
+
+
+def test_within_disk_equals_point_scan():
+    manager, _ = flat_manager(size=100)
+    rng = np.random.default_rng(1)
+    manager.add(
+        np.column_stack([rng.uniform(0, 100, 300), np.full(300, 2.5), rng.uniform(0, 100, 300)])
+    )
+    manager.kill(7)
+    center, radius = (40, 55), 20
+    points = points_in_2dcircle(radius, *center)
+
+    inside = manager.within_disk(center, radius)
+
+    expected = [
+        index
+        for index, (x, _, z) in enumerate(manager.positions.tolist())
+        if (int(x), int(z)) in points and index != 7
+    ]
+    assert inside.tolist() == expected
+
+
+def test_spatial_hash_follows_moving_enemies():
+    manager, _ = flat_manager(size=40)
+    manager.add([(2.5, 2.5, 2.5)])
+    manager.active[:] = True
+
+    for _ in range(60):
+        manager.step(1 / 30, (30.5, 2.5, 2.5))
+
+    assert manager.within_disk((2, 2), 3).tolist() == []
+    assert manager.within_disk((int(manager.positions[0, 0]), 2), 1).tolist() == [0]
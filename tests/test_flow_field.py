@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+
+from block import BIOME_CODES, Biomes
+from enemy_manager import EnemyManager
+from flow_field import CLIMB_COST, OFFSETS, WATER_COST, FlowField
+from terrain import TerrainQuery
+from world_map import WorldMap
+
+
+def flat_terrain(size=20, height=2):
+    world_map = WorldMap.empty((size, size))
+    world_map.biome[:] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[:] = height
+    return TerrainQuery(world_map, size), world_map
+
+
+def test_flat_distances_are_octile_distances():
+    terrain, _ = flat_terrain()
+    field = FlowField(terrain, radius=5)
+
+    assert field.update((10, 10))
+    assert not field.update((10, 10))
+
+    x, z = np.indices(field.distances.shape) - 5
+    dx, dz = np.abs(x), np.abs(z)
+    octile = np.maximum(dx, dz) + (math.sqrt(2) - 1) * np.minimum(dx, dz)
+    assert np.allclose(field.distances, octile)
+
+
+def test_placed_blocks_are_walked_around():
+    terrain, _ = flat_terrain()
+    field = FlowField(terrain, radius=6)
+    field.update((10, 6))
+    assert field.distances[2, 6] == 4  # Cell (6, 6)
+
+    for z in range(2, 11):
+        terrain.add_block(8, 3, z)
+    field.update((10, 6))
+
+    assert field.distances[2, 6] > 4 + 2
+    assert np.isinf(field.costs[OFFSETS.index((1, 0)), 3, 6])  # Into (8, 6) with a block
+    cells, found = field.next_cells(np.array([6.5, 19.5]), np.array([6.5, 19.5]))
+    assert found.tolist() == [True, False]
+    path = [(6, 6)]
+    while path[-1] != (10, 6) and len(path) < 20:
+        cells, _ = field.next_cells(np.array([path[-1][0]]), np.array([path[-1][1]]))
+        path.append(tuple(cells[0].tolist()))
+    assert path[-1] == (10, 6)
+    assert not terrain.has_placed(*np.array(path).T).any()
+
+
+def test_enemy_walks_around_cliff_to_player():
+    terrain, world_map = flat_terrain()
+    world_map.world_height[8, 2:] = 6  # Wall with a gap at z < 2
+    manager = EnemyManager(terrain, flow_field=FlowField(terrain, radius=12))
+    manager.add([(4.5, 2.5, 10.5)])
+    manager.active[:] = True
+
+    for _ in range(30 * 10):
+        manager.step(1 / 30, (12.5, 2.5, 10.5))
+
+    assert np.linalg.norm(manager.positions[0, [0, 2]] - (12.5, 10.5)) < 2
+
+
+def test_cheapest_path_swims_through_water_strip():
+    terrain, world_map = flat_terrain()
+    world_map.biome[8, :] = BIOME_CODES[Biomes.LAKE]
+    world_map.world_height[8, :] = 1  # Water surface one block below the shore
+    field = FlowField(terrain, radius=6)
+
+    field.update((10, 6))
+
+    assert np.isfinite(field.distances).all()
+    # Cell (5, 6), four steps on land, one into water and one climb onto the shore
+    assert field.distances[1, 6] == 4 + WATER_COST + CLIMB_COST
+
+
+def test_enemy_swims_through_lake_to_player():
+    terrain, world_map = flat_terrain()
+    world_map.biome[8, 2:] = BIOME_CODES[Biomes.LAKE]  # Lake with a land bridge at z < 2
+    world_map.world_height[8, 2:] = 1
+    manager = EnemyManager(terrain, flow_field=FlowField(terrain, radius=12))
+    manager.add([(4.5, 2.5, 10.5)])
+    manager.active[:] = True
+
+    for _ in range(30 * 10):
+        manager.step(1 / 30, (12.5, 2.5, 10.5))
+
+    assert np.linalg.norm(manager.positions[0, [0, 2]] - (12.5, 10.5)) < 2
+    assert manager.positions[0, 1] > 2
+
+
+def test_moving_window_queries_only_new_cells():
+    terrain, world_map = flat_terrain(size=30)
+    world_map.world_height[12:15, 10:20] = 4
+    world_map.biome[16, :] = BIOME_CODES[Biomes.LAKE]
+    field = FlowField(terrain, radius=5)
+    field.update((14, 15))
+    field.update((15, 13))
+
+    assert field.cells_queried == 11 * 11 + 11 + 2 * 10
+    fresh = FlowField(terrain, radius=5)
+    fresh.update((15, 13))
+    assert np.array_equal(field.ground, fresh.ground)
+    assert np.array_equal(field.water, fresh.water)
+    assert np.array_equal(field.distances, fresh.distances)
+
+    terrain.add_block(17, 3, 13)
+    field.update((15, 13))
+    assert field.cells_queried == 2 * 11 * 11 + 11 + 2 * 10
+    assert field.blocked[7, 5]
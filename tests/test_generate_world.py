@@ -0,0 +1,64 @@
+import noise
+import numpy as np
+import pytest
+
+from generate_world import (
+    NOISE_HEAT,
+    NOISE_HEIGHT,
+    NOISE_HEIGHT_ISLAND,
+    convert_to_blocks_map,
+    generate_noise_map,
+    world_map_colors,
+    world_map_image,
+)
+from simplex_noise import snoise3_grid
+
+
+@pytest.mark.parametrize("params", [NOISE_HEIGHT, NOISE_HEIGHT_ISLAND, NOISE_HEAT])
+@pytest.mark.parametrize("seed", [34315, 10000, 99999])
+def test_snoise3_grid_equals_snoise3(params, seed):
+    shape = (40, 30)
+
+    field = snoise3_grid(shape, z=seed, **params)
+
+    expected = [
+        noise.snoise3(x / shape[0], y / shape[1], z=seed, **params) for y, x in np.ndindex(shape)
+    ]
+    assert np.array_equal(field.astype(np.float64), np.array(expected).reshape(shape))
+
+
+def test_generate_noise_map_normalized():
+    noise_map = generate_noise_map((20, 20), 34315, **NOISE_HEIGHT_ISLAND)
+
+    assert noise_map.shape == (20, 20)
+    assert noise_map.min() == 0
+    assert noise_map.max() == 1
+
+
+def test_parallel_generation_equals_serial():
+    shape = (70, 50)
+    height_map = generate_noise_map(shape, 34315, workers=1, **NOISE_HEIGHT_ISLAND)
+    heat_map = generate_noise_map(shape, 34315, workers=1, **NOISE_HEAT)
+    world_map = convert_to_blocks_map(height_map, heat_map, workers=1)
+
+    height_map_parallel = generate_noise_map(shape, 34315, workers=2, **NOISE_HEIGHT_ISLAND)
+    world_map_parallel = convert_to_blocks_map(height_map_parallel, heat_map, workers=2)
+
+    assert np.array_equal(height_map_parallel, height_map)
+    assert np.array_equal(world_map_parallel.biome, world_map.biome)
+    assert np.array_equal(world_map_parallel.world_height, world_map.world_height)
+
+
+@pytest.mark.parametrize("border", [True, False])
+def test_world_map_image_equals_imsave_of_world_map_colors(border):
+    shape = (30, 20)
+    height_map = generate_noise_map(shape, 34315, workers=1, **NOISE_HEIGHT_ISLAND)
+    heat_map = generate_noise_map(shape, 34315, workers=1, **NOISE_HEAT)
+    world_map = convert_to_blocks_map(height_map, heat_map, workers=1)
+
+    image = world_map_image(world_map, border=border)
+
+    # plt.imsave truncates the float colors to uint8
+    expected = (np.array(world_map_colors(world_map, border=border)) * 255).astype(np.uint8)
+    assert image.dtype == np.uint8
+    assert np.array_equal(image, expected)
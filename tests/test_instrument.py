@@ -0,0 +1,50 @@
+import pytest
+
+import instrument
+
+
+@pytest.fixture
+def enabled():
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.enable(False)
+    instrument.reset()
+
+
+def test_disabled_records_nothing():
+    instrument.reset()
+
+    @instrument.timed
+    def work(value):
+        return value * 2
+
+    assert work(2) == 4
+    instrument.count("calls")
+    with instrument.span("block"):
+        pass
+
+    assert instrument.snapshot() == {"timers": {}, "counters": {}}
+
+
+def test_timers_counters_and_percentiles(enabled):
+    @instrument.timed("named")
+    def work():
+        instrument.count("work")
+
+    for _ in range(3):
+        work()
+    with instrument.span("block"):
+        pass
+    for duration_ms in [1] * 98 + [100, 200]:
+        instrument.observe("frame", duration_ms)
+
+    snapshot = instrument.snapshot()
+    assert snapshot["timers"]["named"]["calls"] == 3
+    assert snapshot["timers"]["block"]["calls"] == 1
+    assert snapshot["counters"] == {"work": 3}
+    frame = snapshot["timers"]["frame"]
+    assert frame["max_ms"] == 200 and frame["min_ms"] == 1
+    assert 1 <= frame["p50_ms"] < 2.1  # Upper bound of the power of two bucket
+    assert 100 <= frame["p99_ms"] <= 200
+    assert instrument.report(limit=1)[0].startswith("frame: 100 calls")
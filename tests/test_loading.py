@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from loading import LoadingPipeline, LoadingStage
+
+
+def wait_finished(pipeline):
+    pipeline._thread.join(timeout=5)
+    assert pipeline.finished
+
+
+def test_loading_pipeline_results_and_progress():
+    def _square(results, progress):
+        progress(0.5)
+        return results["number"] ** 2
+
+    pipeline = LoadingPipeline(
+        [
+            LoadingStage("number", lambda results, progress: 3, weight=1),
+            LoadingStage("square", _square, weight=3),
+        ]
+    )
+    assert pipeline.progress == 0
+
+    wait_finished(pipeline.start())
+
+    assert pipeline.is_done("number")
+    assert pipeline.result("square") == 9
+    assert pipeline.progress == 1
+    pipeline.raise_error()
+
+
+def test_loading_pipeline_stage_progress():
+    reported, resume = threading.Event(), threading.Event()
+
+    def _slow(results, progress):
+        progress(0.5)
+        reported.set()
+        resume.wait(timeout=5)
+
+    pipeline = LoadingPipeline([LoadingStage("slow", _slow, weight=2)]).start()
+    reported.wait(timeout=5)
+
+    assert pipeline.progress == 0.5
+    assert not pipeline.is_done("slow")
+    resume.set()
+    wait_finished(pipeline)
+
+
+def test_loading_pipeline_error_and_cancel():
+    def _fail(results, progress):
+        raise ValueError("broken")
+
+    pipeline = LoadingPipeline([LoadingStage("fail", _fail)]).start()
+    wait_finished(pipeline)
+    with pytest.raises(ValueError):
+        pipeline.raise_error()
+
+    pipeline = LoadingPipeline([LoadingStage("never", _fail)])
+    pipeline.cancel()
+    wait_finished(pipeline.start())
+    assert not pipeline.is_done("never")
+    pipeline.raise_error()
@@ -0,0 +1,70 @@
+import numpy as np
+
+from block import BIOME_CODES, Biomes
+from chunk_mesh import OUTSIDE, TOP, chunk_faces
+from lod import LodTile, build_lod_meshes, lod_region, lod_tiles
+from utils import chunks_in_2dcircle
+from world_map import WorldMap
+
+
+def test_tiles_cover_view_disk_once_with_full_cubes_in_render_distance():
+    center, world_size = (300, 170), 600
+    tiles = lod_tiles(center, 20, (48, 96), 144, 16, world_size)
+
+    covered = np.zeros((world_size, world_size), dtype=int)
+    for tile in tiles:
+        size = tile.cell_size(16)
+        covered[tile.x * size : (tile.x + 1) * size, tile.z * size : (tile.z + 1) * size] += 1
+    x, z = np.indices(covered.shape)
+    in_view = (x - center[0]) ** 2 + (z - center[1]) ** 2 <= 144**2
+
+    assert covered.max() == 1
+    assert covered[in_view].all()
+    full = {(tile.x, tile.z) for tile in tiles if tile.detail == 0}
+    assert full == chunks_in_2dcircle(20, center, 16, world_size)
+    assert {tile.detail for tile in tiles} == {0, 1, 2, 3}
+    assert len(tiles) < 100
+
+
+def test_samples_are_highest_cells_and_padding_lowest():
+    world_map = WorldMap.empty((8, 8))
+    world_map.biome[:] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[:] = 2
+    world_map.world_height[1, 0] = 5
+    world_map.biome[1, 0] = BIOME_CODES[Biomes.MOUNTAIN]
+    world_map.world_height[4, 1] = 1
+
+    padded = lod_region(world_map, LodTile(1, 0, 0, 1), chunk_size=2)
+
+    assert padded.shape == (4, 4)
+    assert padded.world_height[1, 1] == 5
+    assert padded.biome[1, 1] == BIOME_CODES[Biomes.MOUNTAIN]
+    assert padded.world_height[3, 1] == 1  # Padding sample of cells x 4-5, z 0-1
+    assert (padded.biome[0] == OUTSIDE).all()
+    assert (padded.biome[:, 0] == OUTSIDE).all()
+
+
+def test_lod_mesh_spans_tile_cells():
+    world_map = WorldMap.empty((64, 64))
+    world_map.biome[:] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[:] = 3
+    tile = LodTile(1, 1, 0, 2)
+
+    land, water = build_lod_meshes(world_map, tile, chunk_size=16)
+
+    land_faces, _ = chunk_faces(lod_region(world_map, tile, 16), 8, 0)
+    assert np.sum(land_faces.side == TOP) == 8 * 8
+    assert land.vertices[:, 0].min() == 32 and land.vertices[:, 0].max() == 64
+    assert land.vertices[:, 2].min() == 0 and land.vertices[:, 2].max() == 32
+    assert len(water) == 0
+
+
+def test_lod_mesh_ends_at_world_border():
+    world_map = WorldMap.empty((40, 40))
+    world_map.biome[:] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[:] = 3
+
+    land, _ = build_lod_meshes(world_map, LodTile(1, 1, 0, 1), chunk_size=16)
+
+    assert len(land) > 0
+    assert land.vertices[:, 0].max() == 40 and land.vertices[:, 2].max() == 32
@@ -0,0 +1,19 @@
+from pool import Pool
+
+
+def test_released_items_are_reused_up_to_max_size():
+    discarded = list()
+    pool = Pool(max_size=2, discard=discarded.append)
+
+    assert pool.acquire() is None
+    for item in "abc":
+        pool.release(item)
+
+    assert discarded == ["c"]
+    assert pool.acquire() == "b"
+    assert len(pool) == 1
+    assert (pool.created, pool.reused) == (1, 1)
+
+    pool.clear()
+    assert discarded == ["c", "a"]
+    assert pool.acquire() is None
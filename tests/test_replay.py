@@ -0,0 +1,32 @@
+import numpy as np
+
+from replay import FrameStats, circle_path, line_path, summary
+
+
+def test_line_path_walks_at_speed_and_stays_in_world():
+    path = line_path((5.0, 5.0), frames=2000, speed=8, dt=1 / 60, world_size=50)
+
+    points = np.array(path)
+    steps = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    assert len(path) == 2000
+    assert path[0] == (5.0, 5.0)
+    assert (points >= 1).all() and (points <= 49).all()
+    assert np.allclose(steps[:10], 8 / 60)
+    assert (steps <= 8 / 60 + 1e-9).all()
+
+
+def test_circle_path_returns_to_start_after_one_circle():
+    path = circle_path((20.0, 30.0), frames=601, speed=6, dt=1 / 60)
+
+    assert np.allclose(path[0], (20, 30))
+    assert np.allclose(path[600], (20, 30))
+
+
+def test_summary_percentiles_of_frame_times():
+    frames = [FrameStats(i, 0, 0, i, 2 * i, 0, 0, 0, 0, 0, 0) for i in range(1, 101)]
+
+    result = summary(frames)
+
+    assert result["update_ms"]["p50"] == 50.5
+    assert result["frame_ms"]["max"] == 200
+    assert 98 < result["update_ms"]["p99"] < 100
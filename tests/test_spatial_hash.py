@@ -0,0 +1,26 @@
+from spatial_hash import SpatialHash
+
+
+def test_query_box_visits_overlapping_cells():
+    spatial_hash = SpatialHash(cell_size=4)
+    spatial_hash.insert("a", 1.5, 1.5)
+    spatial_hash.insert("b", 9.5, 1.5)
+    spatial_hash.insert("c", -3.5, 2)
+
+    assert set(spatial_hash.query_box(0, 3, 0, 3)) == {"a"}
+    assert set(spatial_hash.query_box(-1, 8, 0, 3)) == {"a", "b", "c"}
+
+
+def test_move_and_remove():
+    spatial_hash = SpatialHash(cell_size=4)
+    spatial_hash.insert("a", 1.5, 1.5)
+
+    spatial_hash.move("a", 2.5, 3.5)
+    assert spatial_hash.buckets == {(0, 0): {"a"}}
+
+    spatial_hash.move("a", 6.5, 1.5)
+    assert spatial_hash.buckets == {(1, 0): {"a"}}
+
+    spatial_hash.remove("a")
+    assert len(spatial_hash) == 0
+    assert spatial_hash.buckets == {}
@@ -0,0 +1,50 @@
+import numpy as np
+
+from block import BIOME_CODES, Biomes
+from chunked_world import ChunkedWorldMap
+from spawn import land_cells, plan_spawns
+from terrain import WATER_CODES
+from world_map import WorldMap
+
+
+def island_map(size=40):
+    world_map = WorldMap.empty((size, size))
+    world_map.biome[:] = BIOME_CODES[Biomes.SEA]
+    world_map.biome[10:30, 10:30] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[10:30, 10:30] = 3
+    return world_map
+
+
+def test_spawns_on_land_outside_player_disk_and_deterministic():
+    cells, heights = land_cells(island_map())
+    assert len(cells) == 20 * 20
+    assert (heights == 3).all()
+
+    spawns = plan_spawns(cells, 50, seed=7, center=(15, 15), radius=5)
+
+    assert len(set(spawns.tolist())) == 50
+    assert (((cells[spawns] - (15, 15)) ** 2).sum(axis=1) > 25).all()
+    assert spawns.tolist() == plan_spawns(cells, 50, 7, (15, 15), 5).tolist()
+    assert spawns.tolist() != plan_spawns(cells, 50, 8, (15, 15), 5).tolist()
+
+
+def test_spawns_keep_minimum_spacing_and_stop_without_room():
+    cells, _ = land_cells(island_map())
+
+    spawns = plan_spawns(cells, 1000, seed=1, center=(0, 0), radius=0, min_spacing=3)
+
+    points = cells[spawns]
+    distances = np.linalg.norm(points[:, None] - points[None], axis=2)
+    assert 10 < len(spawns) < 1000
+    assert (distances[np.triu_indices(len(points), 1)] >= 3).all()
+
+
+def test_chunked_world_spawns_on_land_of_its_chunks():
+    world_map = ChunkedWorldMap(seed=3, world_size=600, chunk_size=64, overview_size=100)
+    cells, heights = land_cells(world_map)
+
+    spawns = plan_spawns(cells, 20, seed=3, center=(300, 300), radius=20)
+
+    biome, world_height = world_map.take(cells[spawns, 0], cells[spawns, 1])
+    assert not np.isin(biome, WATER_CODES).any()
+    assert (world_height == heights[spawns]).all()
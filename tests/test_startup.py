@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+from startup import ImportTime, parse_importtime, slowest_imports
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   zipimport
+import time:       300 |       1500 | block
+import time:      1200 |       1200 |   numpy
+startup: play imported
+import time:     90000 |      90000 | matplotlib
+"""
+
+
+def test_parse_importtime_up_to_marker():
+    times = parse_importtime(IMPORTTIME.splitlines(), stop="startup: play imported")
+
+    assert times == [
+        ImportTime("zipimport", 120, 120, 1),
+        ImportTime("block", 300, 1500, 0),
+        ImportTime("numpy", 1200, 1200, 1),
+    ]
+    assert [time.module for time in slowest_imports(times, 2)] == ["block", "numpy"]
+
+
+def test_world_generation_does_not_import_matplotlib():
+    code = "import sys, chunk_mesh, generate_world, world_cache; print('matplotlib' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert output.stdout.strip() == "False"
@@ -0,0 +1,45 @@
+from block import BIOME_CODES, Biomes
+from terrain import FLOOR_Y, TerrainQuery
+from world_map import WorldMap
+
+
+def terrain_query():
+    world_map = WorldMap.empty((4, 4))
+    world_map.biome[:] = BIOME_CODES[Biomes.PLANE]
+    world_map.world_height[:] = 2
+    world_map.biome[3, 3] = BIOME_CODES[Biomes.LAKE]
+    return TerrainQuery(world_map, 4)
+
+
+def test_ground_height_of_terrain():
+    terrain = terrain_query()
+
+    assert terrain.ground_height(1.5, 1.2) == 2.5
+    assert terrain.ground_height(3.5, 3.5) == FLOOR_Y  # Water is not solid
+    assert terrain.ground_height(-0.5, 1.5) == FLOOR_Y  # Outside the world
+    assert terrain.ground_height(1.5, 1.5, below=1) == FLOOR_Y
+
+
+def test_placed_blocks_stack_on_terrain():
+    terrain = terrain_query()
+    terrain.add_block(1, 3, 1)
+    terrain.add_block(1, 5, 1)
+
+    assert terrain.ground_height(1.5, 1.5) == 5.5
+    assert terrain.ground_height(1.5, 1.5, below=5) == 3.5
+    assert terrain.is_blocked(1.5, 3.2, 1.5)
+    assert not terrain.is_blocked(1.5, 3.6, 1.5)
+
+    terrain.remove_block(1, 5, 1)
+    terrain.remove_block(1, 3, 1)
+
+    assert terrain.ground_height(1.5, 1.5) == 2.5
+    assert terrain.placed == {}
+
+
+def test_is_blocked_below_terrain_top():
+    terrain = terrain_query()
+
+    assert terrain.is_blocked(0.5, 2.4, 0.5)
+    assert not terrain.is_blocked(0.5, 2.6, 0.5)
+    assert not terrain.is_blocked(3.5, 0, 3.5)
@@ -1,6 +1,30 @@
+from itertools import product
+
 import pytest
 
-from utils import points_in_2dcircle, pos_to_xyz
+from utils import (
+    chunks_in_2dcircle,
+    disk_offsets,
+    points_changed_2dcircle,
+    points_in_2dcircle,
+    pos_to_xyz,
+    ring_offsets,
+)
+
+
+def points_in_2dcircle_reference(radius, x_offset=0, y_offset=0):
+    all_points = set()
+    for x, y in product(range(radius + 1), repeat=2):
+        if x**2 + y**2 <= radius**2:
+            all_points.update(
+                {
+                    (x_offset + x, y_offset + y),
+                    (x_offset + x, y_offset - y),
+                    (x_offset - x, y_offset + y),
+                    (x_offset - x, y_offset - y),
+                }
+            )
+    return all_points
 
 
 @pytest.mark.parametrize("position", [[1, 2, 3], ["1", "2", "3"]])
@@ -31,3 +55,44 @@ def test_points_in_2dcircle():
         (1, 0),
         (0, -1),
     }
+
+
+@pytest.mark.parametrize("radius", [0, 1, 4, 7, 20, 30])
+def test_points_in_2dcircle_equals_reference(radius):
+    assert points_in_2dcircle(radius, 5, -3) == points_in_2dcircle_reference(radius, 5, -3)
+    assert len(disk_offsets(radius)) == len(points_in_2dcircle_reference(radius))
+
+
+@pytest.mark.parametrize("radius", [1, 4, 20])
+@pytest.mark.parametrize("step", [(1, 0), (-1, 0), (0, 1), (1, -1), (-1, -1), (3, 2), (50, 0)])
+def test_points_changed_2dcircle_equals_set_difference(radius, step):
+    center_old = (10, 20)
+    center_new = (center_old[0] + step[0], center_old[1] + step[1])
+    points_old = points_in_2dcircle_reference(radius, *center_old)
+    points_new = points_in_2dcircle_reference(radius, *center_new)
+
+    points_add, points_del = points_changed_2dcircle(radius, center_old, center_new)
+
+    assert points_add == points_new - points_old
+    assert points_del == points_old - points_new
+
+
+def test_ring_offsets_unit_step_is_linear():
+    entering, leaving = ring_offsets(30, (1, 0))
+
+    assert len(entering) == len(leaving) == 2 * 30 + 1
+    assert points_changed_2dcircle(30, (0, 0), (0, 0)) == (set(), set())
+
+
+@pytest.mark.parametrize("center", [(0, 0), (17, 40), (63, 63)])
+def test_chunks_in_2dcircle_cover_circle_in_world(center):
+    chunk_size, world_size = 8, 64
+    points = {
+        point
+        for point in points_in_2dcircle_reference(10, *center)
+        if all(0 <= axis < world_size for axis in point)
+    }
+
+    chunks = chunks_in_2dcircle(10, center, chunk_size, world_size)
+
+    assert chunks == {(x // chunk_size, z // chunk_size) for x, z in points}
@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+
+from world_cache import cache_key, evict, load_world_map, save_world_map
+from world_map import WorldMap
+
+
+def random_world_map(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return WorldMap(rng.integers(0, 8, (size, size)), rng.integers(0, 40, (size, size)))
+
+
+def test_world_cache_roundtrip(tmp_path):
+    world_map = random_world_map(20)
+    assert load_world_map(1, 20, cache_dir=tmp_path) is None
+
+    save_world_map(1, 20, world_map, cache_dir=tmp_path)
+    cached_map = load_world_map(1, 20, cache_dir=tmp_path)
+
+    assert isinstance(cached_map.biome, np.memmap)
+    assert np.array_equal(cached_map.biome, world_map.biome)
+    assert np.array_equal(cached_map.world_height, world_map.world_height)
+    assert load_world_map(2, 20, cache_dir=tmp_path) is None
+    assert load_world_map(1, 30, cache_dir=tmp_path) is None
+
+
+def test_world_cache_key():
+    assert cache_key(1, 20) == cache_key(1, 20)
+    assert cache_key(1, 20) != cache_key(2, 20)
+    assert cache_key(1, 20) != cache_key(1, 21)
+
+
+def test_world_cache_evicts_least_recently_used(tmp_path):
+    for seed in range(3):
+        save_world_map(seed, 20, random_world_map(20, seed), cache_dir=tmp_path)
+        header = tmp_path / f"{cache_key(seed, 20)}.json"
+        os.utime(header, (seed, seed))
+    load_world_map(0, 20, cache_dir=tmp_path)  # Mark seed 0 as recently used
+
+    entry_bytes = sum(f.stat().st_size for f in tmp_path.iterdir()) // 3
+    evict(tmp_path, max_bytes=entry_bytes * 2)
+
+    assert load_world_map(0, 20, cache_dir=tmp_path) is not None
+    assert load_world_map(1, 20, cache_dir=tmp_path) is None
+    assert load_world_map(2, 20, cache_dir=tmp_path) is not None
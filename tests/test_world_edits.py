@@ -0,0 +1,73 @@
+import os
+
+from world_edits import RECORD, EditLog, edit_log_path
+
+
+def test_place_and_remove_per_chunk():
+    edits = EditLog(chunk_size=16)
+    edits.place(1, 5, 2)
+    edits.place(17, 6, 2)
+    edits.remove(3, 4, 3)
+
+    assert edits.placed((0, 0)).tolist() == [[1, 5, 2]]
+    assert edits.placed((1, 0)).tolist() == [[17, 6, 2]]
+    assert edits.removed((0, 0)).tolist() == [[3, 4, 3]]
+
+    edits.remove(17, 6, 2)  # Removing a placed block needs no entry
+    edits.place(3, 4, 3)
+    assert set(edits.chunks) == {(0, 0)}
+    assert edits.placed((0, 0)).tolist() == [[1, 5, 2], [3, 4, 3]]
+    assert edits.removed((0, 0)).tolist() == [[3, 4, 3]]  # Replaced by the placed block
+    assert len(edits.placed((5, 5))) == 0
+
+    edits.remove(3, 4, 3)  # The generated block of the cell stays removed
+    assert edits.removed((0, 0)).tolist() == [[3, 4, 3]]
+    assert edits.placed((0, 0)).tolist() == [[1, 5, 2]]
+
+
+def test_log_is_appended_and_loaded(tmp_path):
+    file_path = str(tmp_path / "edits" / "world.edits")
+    edits = EditLog(file_path, flush_size=2)
+    edits.place(1, 5, 2)
+    assert not os.path.exists(file_path)
+    edits.place(-1, 5, 40)
+    assert os.path.getsize(file_path) == 2 * RECORD.itemsize
+
+    edits.remove(1, 5, 2)
+    edits.flush()
+    assert os.path.getsize(file_path) == 3 * RECORD.itemsize
+
+    loaded = EditLog.load(file_path)
+    assert loaded.chunks.keys() == edits.chunks.keys()
+    assert loaded.placed((-1, 2)).tolist() == [[-1, 5, 40]]
+    assert len(EditLog.load(str(tmp_path / "missing.edits"))) == 0
+
+
+def test_every_edit_is_written_by_default(tmp_path):
+    file_path = str(tmp_path / "world.edits")
+    edits = EditLog(file_path)
+    edits.place(1, 5, 2)
+
+    assert EditLog.load(file_path).placed((0, 0)).tolist() == [[1, 5, 2]]
+
+
+def test_load_compacts_overwritten_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr("world_edits.COMPACT_MIN_RECORDS", 10)
+    file_path = str(tmp_path / "world.edits")
+    edits = EditLog(file_path, flush_size=100)
+    for _ in range(10):
+        edits.place(1, 5, 2)
+        edits.remove(1, 5, 2)
+    edits.place(3, 5, 2)
+    edits.flush()
+
+    loaded = EditLog.load(file_path)
+
+    assert os.path.getsize(file_path) == RECORD.itemsize
+    assert loaded.placed((0, 0)).tolist() == [[3, 5, 2]]
+    assert EditLog.load(file_path).placed((0, 0)).tolist() == [[3, 5, 2]]
+
+
+def test_edit_log_path_per_world():
+    assert edit_log_path(1, 20, "edits") != edit_log_path(1, 30, "edits")
+    assert edit_log_path(1, 20, "edits").startswith(os.path.join("edits", "seed_1_"))
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from block import BIOME_CODES, Biomes
+from world_map import WorldMap
+
+
+def test_world_map_cell_access():
+    world_map = WorldMap.empty((3, 4))
+    world_map.biome[1, 2] = BIOME_CODES[Biomes.HILL]
+    world_map.world_height[1, 2] = 12
+
+    cell = world_map[1][2]
+
+    assert cell.biome == Biomes.HILL
+    assert cell.world_height == 12
+    assert world_map[1, 2] == cell
+    assert world_map[0][0].biome == Biomes.SEA
+
+
+def test_world_map_out_of_bounds():
+    world_map = WorldMap.empty((3, 3))
+
+    with pytest.raises(IndexError):
+        world_map[3]
+    with pytest.raises(IndexError):
+        world_map[0][3]
+
+
+def test_world_map_compact_dtypes():
+    world_map = WorldMap(np.ones((2, 2)), np.ones((2, 2)))
+
+    assert world_map.biome.dtype == np.uint8
+    assert world_map.world_height.dtype == np.int16
+    assert world_map.nbytes == 4 * 3
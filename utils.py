@@ -1,15 +1,19 @@
 import logging
-import time
-from itertools import product
-from typing import Any, Callable, List, Set, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
 
 import conf
+import instrument
 
 X = 0
 Y = 1
 Z = 2
 Z_2D = 1
 
+Progress = Optional[Callable[[float], None]]  # Called with the finished fraction of a task
+
 logger = logging.getLogger(conf.LOGGER_FILE_NAME)
 
 
@@ -17,18 +21,71 @@ def pos_to_xyz(position: List) -> Tuple[int, int, int]:
     return int(position[X]), int(position[Y]), int(position[Z])
 
 
+@lru_cache(maxsize=None)
+def disk_offsets(radius: int) -> np.ndarray:
+    """Relative (x, y) offsets of all points in a 2D circle, cached per radius"""
+    span = np.arange(-radius, radius + 1)
+    x, y = np.meshgrid(span, span, indexing="ij")
+    inside = x**2 + y**2 <= radius**2
+    offsets = np.stack([x[inside], y[inside]], axis=1)
+    offsets.setflags(write=False)
+    return offsets
+
+
+@lru_cache(maxsize=None)
+def ring_table(radius: int) -> Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]]:
+    """Entering and leaving offsets of a 2D circle for every unit step, cached per radius"""
+    steps = [(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if (x, y) != (0, 0)]
+    return {step: _ring_offsets(radius, step) for step in steps}
+
+
+def _ring_offsets(radius: int, step: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    disk = disk_offsets(radius)
+    entering = disk[((disk + step) ** 2).sum(axis=1) > radius**2]
+    leaving = disk[((disk - step) ** 2).sum(axis=1) > radius**2]
+    return entering, leaving
+
+
+def ring_offsets(radius: int, step: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Offsets entering the circle (relative to the new center) and leaving it (relative to
+    the old center) when the center moves by `step`. O(radius) for unit steps."""
+    if step in ring_table(radius):
+        return ring_table(radius)[step]
+    return _ring_offsets(radius, step)
+
+
+def _to_points(offsets: np.ndarray, x_offset: int, y_offset: int) -> Set[Tuple[int, int]]:
+    return set(map(tuple, (offsets + (x_offset, y_offset)).tolist()))
+
+
 def points_in_2dcircle(radius: int, x_offset: int = 0, y_offset: int = 0) -> Set[Tuple[int, int]]:
-    all_points: Set = set()
-    for x, y in product(range(radius + 1), repeat=2):
-        if x**2 + y**2 <= radius**2:
-            coords = (
-                (x_offset + x, y_offset + y),
-                (x_offset + x, y_offset - y),
-                (x_offset - x, y_offset + y),
-                (x_offset - x, y_offset - y),
-            )
-            all_points = all_points.union(coords)
-    return all_points
+    return _to_points(disk_offsets(radius), x_offset, y_offset)
+
+
+def points_changed_2dcircle(
+    radius: int, center_old: Tuple[int, int], center_new: Tuple[int, int]
+) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+    """Points entering and leaving a 2D circle when its center moves"""
+    step = (center_new[X] - center_old[X], center_new[Z_2D] - center_old[Z_2D])
+    if step == (0, 0):
+        return set(), set()
+    entering, leaving = ring_offsets(radius, step)
+    return _to_points(entering, *center_new), _to_points(leaving, *center_old)
+
+
+def chunks_in_2dcircle(
+    radius: int, center: Tuple[int, int], chunk_size: int, world_size: int
+) -> Set[Tuple[int, int]]:
+    """Keys of the square chunks in the world that overlap a 2D circle"""
+    total_chunks = -(-world_size // chunk_size)
+    keys = np.arange(total_chunks)
+    # Distance from the center to the nearest cell of every chunk row and column
+    nearest = [
+        np.clip(center[axis], keys * chunk_size, (keys + 1) * chunk_size - 1) - center[axis]
+        for axis in (X, Z_2D)
+    ]
+    inside = nearest[X][:, None] ** 2 + nearest[Z_2D][None, :] ** 2 <= radius**2
+    return {(x, z) for x, z in np.argwhere(inside).tolist()}
 
 
 def setup_logger(logger, level: int = logging.DEBUG) -> None:
@@ -48,14 +105,8 @@ def setup_logger(logger, level: int = logging.DEBUG) -> None:
 
 
 def timeit(method: Callable) -> Callable:
-    def timed(*args, **kw) -> Any:
-        time_start = time.time()
-        result = method(*args, **kw)
-        time_end = time.time()
-        logger.debug(f"Function '{method.__name__}' executed in {time_end - time_start:.3f}s")
-        return result
-
-    return timed
+    """Time the calls of `method` when the instrumentation is enabled, see instrument.py"""
+    return instrument.timed(method)
 
 
 setup_logger(logger)
@@ -0,0 +1,107 @@
+"""On-disk cache of generated world maps
+
+Every entry is a small JSON header with the generation parameters plus one uncompressed `.npy`
+file per world map array, so cached worlds are memory-mapped instead of regenerated. The cache
+is limited in size, the least recently used worlds are removed first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from os import path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import conf
+from generate_world import GENERATOR_VERSION, NOISE_HEAT, NOISE_HEIGHT_ISLAND
+from world_map import WorldMap
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+ARRAYS = ("biome", "world_height")
+
+
+def cache_params(seed: int, world_size: int) -> Dict:
+    return {
+        "seed": seed,
+        "world_size": world_size,
+        "noise_height": NOISE_HEIGHT_ISLAND,
+        "noise_heat": NOISE_HEAT,
+        "generator_version": GENERATOR_VERSION,
+    }
+
+
+def cache_key(seed: int, world_size: int) -> str:
+    params = json.dumps(cache_params(seed, world_size), sort_keys=True)
+    return f"seed_{seed}_{hashlib.sha1(params.encode()).hexdigest()[:16]}"
+
+
+def _entry_paths(cache_dir: str, key: str) -> List[str]:
+    return [path.join(cache_dir, f"{key}.json")] + [
+        path.join(cache_dir, f"{key}.{name}.npy") for name in ARRAYS
+    ]
+
+
+def load_world_map(
+    seed: int, world_size: int, cache_dir: str = conf.WORLD_CACHE_DIR
+) -> Optional[WorldMap]:
+    """Memory-mapped world map from the cache, None if not cached"""
+    entry_paths = _entry_paths(cache_dir, cache_key(seed, world_size))
+    if not all(path.exists(file_path) for file_path in entry_paths):
+        return None
+    header_path, *array_paths = entry_paths
+    try:
+        arrays = [np.load(array_path, mmap_mode="r") for array_path in array_paths]
+        world_map = WorldMap(*arrays)
+    except (OSError, ValueError) as error:
+        logger.warning(f"Ignore broken world cache {header_path}: {error}")
+        return None
+    if world_map.shape != (world_size, world_size):
+        return None
+    os.utime(header_path)  # Mark as recently used
+    logger.info(f"World map loaded from cache {header_path}")
+    return world_map
+
+
+def save_world_map(
+    seed: int,
+    world_size: int,
+    world_map: WorldMap,
+    cache_dir: str = conf.WORLD_CACHE_DIR,
+    max_bytes: int = conf.WORLD_CACHE_MB * 2**20,
+) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    key = cache_key(seed, world_size)
+    header_path, *array_paths = _entry_paths(cache_dir, key)
+    for name, array_path in zip(ARRAYS, array_paths):
+        tmp_path = f"{array_path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, np.ascontiguousarray(getattr(world_map, name)))
+        os.replace(tmp_path, array_path)
+    # The header is written last, an entry without header is not complete
+    with open(f"{header_path}.tmp", "w") as file:
+        json.dump(cache_params(seed, world_size), file, sort_keys=True)
+    os.replace(f"{header_path}.tmp", header_path)
+    logger.info(f"World map saved to cache {header_path}")
+    evict(cache_dir, max_bytes=max_bytes, keep=key)
+
+
+def evict(cache_dir: str, max_bytes: int, keep: Optional[str] = None) -> None:
+    """Remove least recently used worlds until the cache fits in `max_bytes`"""
+    keys = [name[: -len(".json")] for name in os.listdir(cache_dir) if name.endswith(".json")]
+    entries = []
+    for key in keys:
+        paths = [file_path for file_path in _entry_paths(cache_dir, key) if path.exists(file_path)]
+        entries.append((path.getmtime(paths[0]), key, paths, sum(map(path.getsize, paths))))
+    total_bytes = sum(entry[3] for entry in entries)
+    for _, key, paths, nbytes in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if key == keep:
+            continue
+        for file_path in paths:
+            os.remove(file_path)
+        total_bytes -= nbytes
+        logger.info(f"World map removed from cache {key}")
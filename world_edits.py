@@ -0,0 +1,144 @@
+"""Player edits on top of the generated terrain
+
+Placed and removed blocks are kept per chunk as a small structured array of the edited cells,
+only chunks with edits have an entry. Every edit is also a fixed size record of an append-only
+log file, the log is read back when the world is loaded. Loading and saving only cost time per
+edit, not per world cell. A log with many records of overwritten edits is compacted on load.
+"""
+
+import logging
+import os
+from os import path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import conf
+from world_cache import cache_key
+
+logger = logging.getLogger(conf.LOGGER_NAME)
+
+PLACE = 1
+REMOVE = -1
+REPLACE = 2  # Generated block removed and a block placed in its cell, only as cell state
+
+# Log record of one edit and in memory row of one edited cell, op is PLACE or REMOVE, or
+# REPLACE for a cell
+RECORD = np.dtype([("x", "<i4"), ("y", "<i2"), ("z", "<i4"), ("op", "i1")])
+
+COMPACT_MIN_RECORDS = 256  # Smaller logs are never compacted
+COMPACT_RATIO = 2  # Compact when the log has this many records per edited cell
+
+Key = Tuple[int, int]
+
+
+def edit_log_path(seed: int, world_size: int, edits_dir: str = conf.WORLD_EDITS_DIR) -> str:
+    """Edits are bound to the generated terrain, so to the same key as the world cache"""
+    return path.join(edits_dir, f"{cache_key(seed, world_size)}.edits")
+
+
+class EditLog:
+    chunk_size: int
+    file_path: Optional[str]  # None keeps the edits in memory only
+    flush_size: int
+    chunks: Dict[Key, np.ndarray]  # Edited cells per chunk key, RECORD rows
+    pending: List[Tuple[int, int, int, int]]  # Records not written to the log yet
+
+    def __init__(
+        self,
+        file_path: Optional[str] = None,
+        chunk_size: int = conf.MESH_CHUNK_SIZE,
+        flush_size: int = conf.WORLD_EDITS_FLUSH,
+    ):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.flush_size = flush_size
+        self.chunks = dict()
+        self.pending = list()
+
+    @classmethod
+    def load(cls, file_path: str, chunk_size: int = conf.MESH_CHUNK_SIZE) -> "EditLog":
+        edit_log = cls(file_path, chunk_size)
+        if not path.exists(file_path):
+            return edit_log
+        records = np.fromfile(file_path, dtype=RECORD)
+        for x, y, z, op in records.tolist():
+            edit_log._apply(x, y, z, op)
+        logger.info(f"Loaded {len(edit_log)} edits from {len(records)} records of {file_path}")
+        if len(records) > max(COMPACT_MIN_RECORDS, COMPACT_RATIO * len(edit_log)):
+            edit_log.compact()
+        return edit_log
+
+    def __len__(self) -> int:
+        return sum(len(cells) for cells in self.chunks.values())
+
+    def key(self, x: int, z: int) -> Key:
+        return x // self.chunk_size, z // self.chunk_size
+
+    def place(self, x: int, y: int, z: int) -> None:
+        self._record(x, y, z, PLACE)
+
+    def remove(self, x: int, y: int, z: int) -> None:
+        self._record(x, y, z, REMOVE)
+
+    def placed(self, key: Key) -> np.ndarray:
+        """(n, 3) x, y, z of the blocks placed in chunk `key`"""
+        return self._cells(key, (PLACE, REPLACE))
+
+    def removed(self, key: Key) -> np.ndarray:
+        """(n, 3) x, y, z of the generated blocks removed in chunk `key`"""
+        return self._cells(key, (REMOVE, REPLACE))
+
+    def _cells(self, key: Key, ops: Tuple[int, ...]) -> np.ndarray:
+        cells = self.chunks.get(key)
+        if cells is None:
+            return np.empty((0, 3), dtype=int)
+        cells = cells[np.isin(cells["op"], ops)]
+        return np.column_stack([cells["x"], cells["y"], cells["z"]]).astype(int)
+
+    def _record(self, x: int, y: int, z: int, op: int) -> None:
+        self._apply(x, y, z, op)
+        self.pending.append((x, y, z, op))
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+
+    def _apply(self, x: int, y: int, z: int, op: int) -> None:
+        """Removing a placed block gives back the generated cell, which needs no entry. A cell
+        whose generated block was removed keeps that, also after placing and removing again."""
+        key = self.key(x, z)
+        cells = self.chunks.get(key, np.empty(0, dtype=RECORD))
+        same = (cells["x"] == x) & (cells["y"] == y) & (cells["z"] == z)
+        index = np.flatnonzero(same)
+        if not len(index):
+            cells = np.append(cells, np.array((x, y, z, op), dtype=RECORD))
+        elif op == REMOVE and cells["op"][index[0]] == PLACE:
+            cells = np.delete(cells, index)
+        elif op == PLACE and cells["op"][index[0]] != PLACE:
+            cells["op"][index[0]] = REPLACE
+        else:
+            cells["op"][index[0]] = op
+        if len(cells):
+            self.chunks[key] = cells
+        else:
+            self.chunks.pop(key, None)
+
+    def flush(self) -> None:
+        """Append the pending edits to the log"""
+        if self.file_path is None or not self.pending:
+            self.pending = list()
+            return
+        os.makedirs(path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "ab") as file:
+            np.array(self.pending, dtype=RECORD).tofile(file)
+        self.pending = list()
+
+    def compact(self) -> None:
+        """Rewrite the log with one record per edited cell"""
+        if self.file_path is None:
+            return
+        records = np.concatenate([np.empty(0, dtype=RECORD), *self.chunks.values()])
+        tmp_path = f"{self.file_path}.tmp"
+        records.tofile(tmp_path)
+        os.replace(tmp_path, self.file_path)
+        self.pending = list()
+        logger.info(f"Compacted {self.file_path} to {len(records)} records")
@@ -0,0 +1,93 @@
+from typing import NamedTuple, Protocol, Tuple
+
+import numpy as np
+
+from block import BIOMES_BY_CODE, Biomes
+
+
+class WorldCell(NamedTuple):
+    biome: Biomes
+    world_height: int
+
+
+class CellSource(Protocol):
+    @property
+    def shape(self) -> Tuple[int, int]: ...
+
+    def cell(self, x: int, z: int) -> WorldCell: ...
+
+
+class WorldMapRow:
+    """View on one x row of a world map, `row[z]` returns a WorldCell"""
+
+    __slots__ = ("world_map", "x")
+
+    def __init__(self, world_map: CellSource, x: int):
+        self.world_map = world_map
+        self.x = x
+
+    def __getitem__(self, z: int) -> WorldCell:
+        return self.world_map.cell(self.x, z)
+
+    def __len__(self) -> int:
+        return self.world_map.shape[1]
+
+
+class WorldMap:
+    """Compact world map as two parallel arrays
+
+    `biome` holds the biome codes (index in BIOMES_BY_CODE) as uint8 and `world_height` the
+    block height as int16. Cells are read like the old object array: `world_map[x][z].biome`.
+    """
+
+    biome: np.ndarray
+    world_height: np.ndarray
+
+    def __init__(self, biome: np.ndarray, world_height: np.ndarray):
+        if biome.shape != world_height.shape:
+            raise ValueError(f"Shape mismatch {biome.shape} != {world_height.shape}")
+        self.biome = biome.astype(np.uint8, copy=False)
+        self.world_height = world_height.astype(np.int16, copy=False)
+
+    @classmethod
+    def empty(cls, shape: Tuple[int, int]) -> "WorldMap":
+        return cls(np.zeros(shape, dtype=np.uint8), np.zeros(shape, dtype=np.int16))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.biome.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.biome.nbytes + self.world_height.nbytes
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            return self.cell(*index)
+        if not -self.shape[0] <= index < self.shape[0]:
+            raise IndexError(f"Index {index} out of world map with size {self.shape[0]}")
+        return WorldMapRow(self, index)
+
+    def cell(self, x: int, z: int) -> WorldCell:
+        return WorldCell(BIOMES_BY_CODE[self.biome[x, z]], int(self.world_height[x, z]))
+
+    def take(self, x: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Biome codes and world heights of the cells (x[i], z[i]), indexes must be in the map"""
+        return self.biome[x, z], self.world_height[x, z]
+
+    def region(self, x_start: int, x_stop: int, z_start: int, z_stop: int) -> "WorldMap":
+        """Cells x_start <= x < x_stop and z_start <= z < z_stop, bounds must be in the map"""
+        rows, cols = slice(x_start, x_stop), slice(z_start, z_stop)
+        return WorldMap(self.biome[rows, cols], self.world_height[rows, cols])
+
+    def biome_codes(self) -> np.ndarray:
+        """Biome codes per cell"""
+        return self.biome
+
+    def biome_values(self) -> np.ndarray:
+        """Biome values (color names) per cell"""
+        values = np.array([biome.value for biome in BIOMES_BY_CODE])
+        return values[self.biome]